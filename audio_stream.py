@@ -0,0 +1,260 @@
+# audio_stream.py
+"""
+Continuous microphone capture for the voice assistant. The microphone
+is opened once and read on its own thread into a fixed ring buffer; a
+running noise-floor estimate replaces the per-command
+adjust_for_ambient_noise() call, and utterances are cut out of the
+stream by energy so a command is ready as soon as the speaker pauses.
+
+Each loud segment also has to pass the voice activity detector
+(vad.py) before it is handed on; segments that don't are dropped and
+counted (get_stats()).
+
+With live=True the stream also publishes the audio of an utterance
+while it is still being spoken ("start"/"chunk" events) so a streaming
+recognizer can decode it incrementally.
+"""
+
+import queue
+import threading
+import time
+
+import numpy as np
+
+import config
+from vad import create_vad
+
+class UtteranceSegmenter:
+    """Finds speech segments in a stream of int16 chunks (no device needed)."""
+
+    def __init__(self, rate=None, chunk=None, vad=None):
+        """Preallocates the ring buffer and converts the timing settings to chunks."""
+        self.rate = config.AUDIO_RATE if rate is None else rate
+        self.chunk = chunk or int(self.rate * config.AUDIO_CHUNK_MS / 1000)
+        per_s = self.rate / self.chunk
+        self.vad = vad            # --- Anything with is_speech(chunk); None = energy only.
+        self.min_voiced = max(1, int(config.VAD_MIN_VOICED * per_s))
+        self.stats = {'segments': 0, 'passed': 0, 'too_short': 0, 'no_voice': 0}
+
+        self.ring = np.zeros(int(self.rate * config.AUDIO_BUFFER_SECONDS), dtype=np.int16)
+        self.written = 0               # --- Total samples ever written (ring position = written % size).
+        self.warmup = max(1, int(config.AUDIO_WARMUP_SECONDS * per_s))
+        self.end_chunks = max(1, int(config.AUDIO_END_SILENCE * per_s))
+        self.min_chunks = max(1, int(config.AUDIO_MIN_SPEECH * per_s))
+        self.preroll = int(config.AUDIO_PREROLL * self.rate)
+        self.max_samples = int(config.AUDIO_MAX_UTTERANCE * self.rate)
+
+        self.noise_floor = None   # --- Running RMS of non-speech audio.
+        self.chunks_seen = 0
+        self.reset()
+
+    def reset(self):
+        """Abandons any utterance in progress (the noise floor is kept)."""
+        self.in_speech = False
+        self.start = 0            # --- Absolute sample where the utterance starts (with pre-roll).
+        self.speech_chunks = 0
+        self.silent_chunks = 0
+        self.voiced_chunks = 0
+
+    @property
+    def confirmed(self):
+        """True while inside a segment that has already passed the VAD."""
+        return self.in_speech and (self.vad is None or self.voiced_chunks >= self.min_voiced)
+
+    def threshold(self):
+        """RMS above which a chunk counts as speech."""
+        return max(self.noise_floor * config.AUDIO_SPEECH_RATIO, config.AUDIO_MIN_RMS)
+
+    def is_speech(self, chunk, rms):
+        """Per-chunk speech decision (energy against the noise floor)."""
+        return rms > self.threshold()
+
+    def _write(self, chunk):
+        """Appends a chunk to the ring buffer."""
+        size = len(self.ring)
+        i = self.written % size
+        n = len(chunk)
+        first = min(n, size - i)
+        self.ring[i:i + first] = chunk[:first]
+        if first < n:
+            self.ring[:n - first] = chunk[first:]
+        self.written += n
+
+    def _read(self, start, end):
+        """Copies absolute samples [start, end) out of the ring buffer."""
+        size = len(self.ring)
+        start = max(start, end - size, 0)
+        i, j = start % size, end % size
+        if i < j or end - start == 0:
+            return self.ring[i:j].copy()
+        return np.concatenate([self.ring[i:], self.ring[:j]])
+
+    def feed(self, chunk):
+        """Adds one int16 chunk; returns a finished utterance (int16 array) or None."""
+        self._write(chunk)
+        rms = float(np.sqrt(np.mean(chunk.astype(np.float32) ** 2)))
+        self.chunks_seen += 1
+
+        # --- Start-up: average the first chunks into the initial noise floor.
+        if self.chunks_seen <= self.warmup:
+            n = self.chunks_seen
+            self.noise_floor = rms if self.noise_floor is None else self.noise_floor + (rms - self.noise_floor) / n
+            return None
+
+        speech = self.is_speech(chunk, rms)
+        if not self.in_speech:
+            if not speech:
+                # --- Track the floor only while nobody is talking; drop faster than it rises.
+                a = config.AUDIO_FLOOR_ADAPT * (4.0 if rms < self.noise_floor else 1.0)
+                self.noise_floor += a * (rms - self.noise_floor)
+                return None
+            self.in_speech = True
+            self.start = self.written - len(chunk) - self.preroll
+            self.speech_chunks = 1
+            self.silent_chunks = 0
+            self._check_voice(chunk)
+            return None
+
+        if speech:
+            self.speech_chunks += 1
+            self.silent_chunks = 0
+            self._check_voice(chunk)
+        else:
+            self.silent_chunks += 1
+
+        too_long = self.written - self.start >= self.max_samples
+        if self.silent_chunks < self.end_chunks and not too_long:
+            return None
+
+        # --- End of utterance: too short means a click or a bump, no voice means noise.
+        start, long_enough, voiced = self.start, self.speech_chunks >= self.min_chunks, self.confirmed
+        self.reset()
+        self.stats['segments'] += 1
+        if not long_enough:
+            self.stats['too_short'] += 1
+            return None
+        if not voiced:
+            self.stats['no_voice'] += 1
+            return None
+        self.stats['passed'] += 1
+        return self._read(start, self.written)
+
+    def _check_voice(self, chunk):
+        """Runs the VAD on loud chunks until the segment has enough voiced ones."""
+        if self.vad is not None and self.voiced_chunks < self.min_voiced and self.vad.is_speech(chunk):
+            self.voiced_chunks += 1
+
+class AudioStream:
+    """Keeps the microphone open and queues utterance events from the capture thread."""
+
+    def __init__(self, live=False):
+        """Prepares the segmenter; the device is opened by start()."""
+        rate = config.AUDIO_RATE
+        chunk = int(rate * config.AUDIO_CHUNK_MS / 1000)
+        self.segmenter = UtteranceSegmenter(rate, chunk, vad=create_vad(rate, chunk))
+        # --- (kind, payload): ("start", int16 pre-roll + the segment so far), ("chunk", int16),
+        # --- ("end", sr.AudioData, or None when a started segment was dropped).
+        self.events = queue.Queue()
+        self.live = live         # --- Also queue start/chunk events (streaming recognition).
+        self.paused = False      # --- Set while the assistant is talking (ignore its own voice).
+        self.running = False
+        self.error = None        # --- The read error that stopped the stream, if any.
+        self.read_errors = 0
+        self._mic = None
+        self._thread = None
+
+    def start(self):
+        """Opens the microphone once and starts the capture thread; returns self."""
+        import speech_recognition as sr
+        self._sr = sr
+        self._mic = sr.Microphone(sample_rate=self.segmenter.rate, chunk_size=self.segmenter.chunk)
+        self._source = self._mic.__enter__()
+        self.running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        """Capture loop: read a chunk, feed the segmenter, queue events."""
+        seg = self.segmenter
+        failures = 0
+        while self.running:
+            try:
+                data = self._source.stream.read(seg.chunk)
+            except Exception as e:
+                # --- Back off instead of spinning on a dead device; give up after a streak.
+                failures += 1
+                self.read_errors += 1
+                if failures >= config.AUDIO_MAX_ERRORS:
+                    print(f"Audio stream stopped after {failures} failed reads: {e}")
+                    self.error = e
+                    self.running = False
+                    return
+                print(f"Audio stream error: {e}")
+                time.sleep(min(config.AUDIO_ERROR_BACKOFF * 2 ** (failures - 1), config.AUDIO_ERROR_BACKOFF_MAX))
+                continue
+            failures = 0
+            if self.paused:
+                if seg.confirmed:
+                    self.events.put(("end", None))
+                seg.reset()
+                continue
+            chunk = np.frombuffer(data, dtype=np.int16)
+            # --- Live events begin only once the segment passes the VAD (start carries
+            # --- everything buffered so far), so noise never reaches the recognizer.
+            was_confirmed = seg.confirmed
+            utterance = seg.feed(chunk)
+            if self.live:
+                if was_confirmed:
+                    self.events.put(("chunk", chunk))
+                elif seg.confirmed:
+                    self.events.put(("start", seg._read(seg.start, seg.written)))
+            if utterance is not None:
+                self.events.put(("end", self._sr.AudioData(utterance.tobytes(), seg.rate, 2)))
+            elif was_confirmed and not seg.in_speech:
+                self.events.put(("end", None))
+
+    def get_event(self, timeout=None):
+        """Waits for the next (kind, payload) event; returns None on timeout."""
+        try:
+            return self.events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def get_utterance(self, timeout=None):
+        """Waits for the next finished utterance; returns sr.AudioData or None on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = None if deadline is None else deadline - time.monotonic()
+            if wait is not None and wait <= 0:
+                return None
+            event = self.get_event(wait)
+            if event is None:
+                return None
+            kind, payload = event
+            if kind == "end" and payload is not None:
+                return payload
+
+    def get_stats(self):
+        """Segment counts: passed on, dropped as too short, dropped by the VAD; failed reads."""
+        stats = dict(self.segmenter.stats)
+        stats['read_errors'] = self.read_errors
+        dropped = stats['too_short'] + stats['no_voice']
+        stats['drop_rate'] = round(dropped / stats['segments'], 3) if stats['segments'] else 0.0
+        return stats
+
+    def clear(self):
+        """Drops queued events (e.g. captured while voice mode was off)."""
+        while True:
+            try:
+                self.events.get_nowait()
+            except queue.Empty:
+                return
+
+    def stop(self):
+        """Stops the capture thread and closes the microphone."""
+        self.running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+        if self._mic is not None:
+            self._mic.__exit__(None, None, None)
@@ -0,0 +1,281 @@
+# benchmarks.py
+"""
+Micro-benchmarks for the per-frame math helpers: utils.avg_pt,
+utils.blink_ratio, utils.smooth_val, Calibration.map_to_screen/map_points and the
+equivalent helpers in head_mouse.py and final.py, each next to its
+vectorized alternative. Uses synthetic landmarks, so no camera needed.
+
+Also scores the cursor filters (filters.py) for jitter and lag on
+synthetic noisy trajectories.
+
+Exits with status 1 when a helper is slower than its budget, slower
+than the saved baseline by more than the tolerance, or when the configured
+cursor filter lags or jitters more than the plain EMA. The array path
+(FaceTracker.to_array plus the array helpers) is reported next to the
+scalar code as a speedup, without failing: which one to run is a config
+choice (config.LANDMARK_ARRAYS), not a regression.
+
+Usage:
+    python benchmarks.py                  # run and check against budgets/baseline
+    python benchmarks.py --save-baseline  # record this machine's numbers
+"""
+
+import argparse
+import ast
+import itertools
+import json
+import os
+import sys
+import timeit
+
+import numpy as np
+
+import config
+import filters
+import utils
+from calibration import Calibration
+from face_tracking import FaceTracker
+
+BASELINE_FILE = "benchmarks_baseline.json"
+
+# --- Absolute per-call ceilings in microseconds (generous; catch gross regressions).
+BUDGET_US = {
+    "utils.avg_pt": 10.0,
+    "utils.avg_pt_arr": 10.0,
+    "utils.blink_ratio x2": 15.0,
+    "utils.blink_ratios_arr": 15.0,
+    "utils.smooth_val": 1.0,
+    "FaceTracker.to_array": 30.0,
+    "frame landmarks (scalar)": 20.0,
+    "frame landmarks (array)": 40.0,
+    "Calibration.map_to_screen": 10.0,
+    "Calibration.map_points x64": 60.0,
+    "head_mouse.avg_pt": 30.0,
+    "head_mouse.blink_ratio": 40.0,
+    "head_mouse.smooth_val": 1.0,
+    "head_mouse.map_to_screen": 10.0,
+    "final.avg_pt": 10.0,
+    "final.blink_ratio": 15.0,
+    "final.smooth_val": 1.0,
+    "final.map_to_screen": 10.0,
+    "filters.EmaFilter": 2.0,
+    "filters.OneEuroFilter": 6.0,
+    "filters.KalmanFilter": 6.0,
+}
+
+# --- (scalar, array) cases, reported as the array path's speedup.
+VECTOR_PAIRS = [
+    ("utils.avg_pt", "utils.avg_pt_arr"),
+    ("utils.blink_ratio x2", "utils.blink_ratios_arr"),
+    ("frame landmarks (scalar)", "frame landmarks (array)"),
+]
+
+# --- Filter quality: the configured filter may jitter at most this much more than the EMA.
+JITTER_TOLERANCE = 1.5
+
+class FakeLandmark:
+    """Minimal stand-in for a MediaPipe NormalizedLandmark."""
+    __slots__ = ("x", "y", "z")
+
+    def __init__(self, x, y, z):
+        self.x, self.y, self.z = x, y, z
+
+def make_landmarks(w=640, h=480, seed=0):
+    """Builds matching synthetic landmarks: a protobuf-like list and a pixel array."""
+    rng = np.random.default_rng(seed)
+    raw = rng.random((478, 3)).astype(np.float32)
+    lm = [FakeLandmark(float(x), float(y), float(z)) for x, y, z in raw]
+    pts = raw * np.array([w, h, w], np.float32)
+    return lm, pts
+
+CALIB_PTS = {"CENTER": (320, 240), "TL": (260, 190), "TR": (380, 190),
+             "BL": (260, 290), "BR": (380, 290)}
+
+def load_script_helpers(path, names, namespace):
+    """
+    Pulls only the named top-level functions out of a script without running it
+    (head_mouse.py and final.py open the camera at import time).
+    """
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    body = [node for node in tree.body if isinstance(node, ast.FunctionDef) and node.name in names]
+    exec(compile(ast.Module(body=body, type_ignores=[]), path, "exec"), namespace)
+    return namespace
+
+def build_cases():
+    """Returns a list of (name, zero-arg callable) pairs to time."""
+    w, h = 640, 480
+    lm, pts = make_landmarks(w, h)
+
+    calib = Calibration()
+    calib.cam_pts.update(CALIB_PTS)
+    calib.fit()
+    calib.calibrated = True
+    calib.stage = 5
+    batch = np.tile(np.array([[330.0, 250.0]]), (64, 1))
+
+    # --- Script helpers read a few module globals; give them the same values.
+    script_globals = {
+        "np": np, "cam_pts": dict(CALIB_PTS),
+        "SENS_X": config.SENS_X, "SENS_Y": config.SENS_Y,
+        "screen_w": utils.SCREEN_W, "screen_h": utils.SCREEN_H,
+    }
+    helper_names = {"avg_pt", "blink_ratio", "smooth_val", "map_to_screen"}
+    here = os.path.dirname(os.path.abspath(__file__))
+    hm = load_script_helpers(os.path.join(here, "head_mouse.py"), helper_names, dict(script_globals))
+    fn = load_script_helpers(os.path.join(here, "final.py"), helper_names, dict(script_globals))
+
+    # --- Filters need increasing timestamps between calls.
+    tick = itertools.count()
+    ema, one_euro, kalman = filters.EmaFilter(), filters.OneEuroFilter(), filters.KalmanFilter()
+
+    # --- The whole per-frame landmark step each path pays: protobuf -> array -> features.
+    nose, le, re_ = config.nose_idx, config.left_eye, config.right_eye
+    tracker = FaceTracker(as_array=True)
+
+    def frame_scalar():
+        utils.avg_pt(lm, nose, w, h)
+        utils.blink_ratio(lm, le, w, h)
+        utils.blink_ratio(lm, re_, w, h)
+
+    def frame_array():
+        arr = tracker.to_array(lm, w, h)
+        utils.avg_pt_arr(arr, utils.NOSE_IDX)
+        utils.blink_ratios_arr(arr)
+
+    return [
+        ("utils.avg_pt", lambda: utils.avg_pt(lm, nose, w, h)),
+        ("utils.avg_pt_arr", lambda: utils.avg_pt_arr(pts, utils.NOSE_IDX)),
+        ("utils.blink_ratio x2", lambda: (utils.blink_ratio(lm, le, w, h), utils.blink_ratio(lm, re_, w, h))),
+        ("utils.blink_ratios_arr", lambda: utils.blink_ratios_arr(pts)),
+        ("utils.smooth_val", lambda: utils.smooth_val(100.0, 120.0, config.SMOOTHING)),
+        ("FaceTracker.to_array", lambda: tracker.to_array(lm, w, h)),
+        ("frame landmarks (scalar)", frame_scalar),
+        ("frame landmarks (array)", frame_array),
+        ("Calibration.map_to_screen", lambda: calib.map_to_screen(330, 250)),
+        ("Calibration.map_points x64", lambda: calib.map_points(batch)),
+        ("head_mouse.avg_pt", lambda: hm["avg_pt"](lm, nose, w, h)),
+        ("head_mouse.blink_ratio", lambda: hm["blink_ratio"](lm, le, w, h)),
+        ("head_mouse.smooth_val", lambda: hm["smooth_val"](100.0, 120.0, 0.2)),
+        ("head_mouse.map_to_screen", lambda: hm["map_to_screen"](330, 250)),
+        ("final.avg_pt", lambda: fn["avg_pt"](lm, nose, w, h)),
+        ("final.blink_ratio", lambda: fn["blink_ratio"](lm, le, w, h)),
+        ("final.smooth_val", lambda: fn["smooth_val"](100.0, 120.0, 0.2)),
+        ("final.map_to_screen", lambda: fn["map_to_screen"](330, 250)),
+        ("filters.EmaFilter", lambda: ema(500.0, 400.0, next(tick) / 30.0)),
+        ("filters.OneEuroFilter", lambda: one_euro(500.0, 400.0, next(tick) / 30.0)),
+        ("filters.KalmanFilter", lambda: kalman(500.0, 400.0, next(tick) / 30.0)),
+    ]
+
+def make_trajectory(kind, fps=30, sigma=3.0, seed=1):
+    """Returns (t, true_x, measured_x) for a 3 s synthetic 1-D cursor track."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(0.0, 3.0, 1.0 / fps)
+    if kind == "still":
+        true = np.full_like(t, 500.0)
+    elif kind == "fast":
+        # --- 800 px minimum-jerk head turn lasting 0.3 s, starting at t = 1 s.
+        s = np.clip((t - 1.0) / 0.3, 0.0, 1.0)
+        true = 500.0 + 800.0 * (10 * s ** 3 - 15 * s ** 4 + 6 * s ** 5)
+    else:
+        # --- Slow drift at 50 px/s.
+        true = 500.0 + 50.0 * t
+    return t, true, true + rng.normal(0.0, sigma, len(t))
+
+def filter_quality():
+    """Scores each filter: jitter when still, RMS lag on fast and slow moves (px)."""
+    results = {}
+    for name, make in filters.FILTERS.items():
+        row = {}
+        for kind in ("still", "fast", "slow"):
+            f = make()
+            t, true, meas = make_trajectory(kind)
+            out = np.array([f(m, m, ti)[0] for m, ti in zip(meas, t)])
+            if kind == "still":
+                row["jitter_px"] = float(out[10:].std())
+            elif kind == "fast":
+                window = (t >= 1.0) & (t <= 1.6)
+                row["fast_rmse_px"] = float(np.sqrt(np.mean((out[window] - true[window]) ** 2)))
+            else:
+                row["slow_rmse_px"] = float(np.sqrt(np.mean((out[30:] - true[30:]) ** 2)))
+        results[name] = row
+    return results
+
+def check_filters(quality, name=None):
+    """Fails if the configured filter is laggier than, or much jitterier than, the EMA."""
+    name = config.CURSOR_FILTER if name is None else name
+    chosen, ema = quality[name], quality["ema"]
+    failures = []
+    if chosen["fast_rmse_px"] > ema["fast_rmse_px"]:
+        failures.append(f"filter '{name}' lags more than the EMA on fast moves")
+    if chosen["jitter_px"] > ema["jitter_px"] * JITTER_TOLERANCE:
+        failures.append(f"filter '{name}' jitters over {JITTER_TOLERANCE}x the EMA when still")
+    return failures
+
+def time_call(func, repeat=5):
+    """Returns the best per-call time in microseconds."""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    best = min(timer.repeat(repeat=repeat, number=number))
+    return best / number * 1e6
+
+def run(cases):
+    """Times every case and returns {name: microseconds}."""
+    return {name: time_call(func) for name, func in cases}
+
+def check(results, baseline, tolerance):
+    """Returns a list of human-readable failures (empty if all good)."""
+    failures = []
+    for name, us in results.items():
+        budget = BUDGET_US.get(name)
+        if budget is not None and us > budget:
+            failures.append(f"{name}: {us:.2f} us exceeds budget {budget:.2f} us")
+        base = baseline.get(name)
+        if base is not None and us > base * tolerance:
+            failures.append(f"{name}: {us:.2f} us is over {tolerance:.2f}x baseline {base:.2f} us")
+    return failures
+
+def main():
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark the hot-path math helpers.")
+    parser.add_argument("--save-baseline", action="store_true", help=f"write results to {BASELINE_FILE}")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="allowed slowdown vs baseline")
+    args = parser.parse_args()
+
+    results = run(build_cases())
+    for name, us in results.items():
+        print(f"  {name:<28} {us:8.3f} us/call")
+
+    # --- Show how much the vectorized helpers save over the pure-Python ones.
+    for slow, fast in VECTOR_PAIRS:
+        speedup = results[slow] / results[fast]
+        note = " (slower)" if speedup < 1.0 else ""
+        print(f"  speedup {fast} vs {slow}: {speedup:.2f}x{note}")
+    if config.LANDMARK_ARRAYS and results["frame landmarks (array)"] > results["frame landmarks (scalar)"]:
+        print("  note: LANDMARK_ARRAYS is on but the array path is slower per frame here")
+
+    # --- Jitter/lag of each cursor filter on synthetic trajectories.
+    quality = filter_quality()
+    print("  filter       jitter(still)  rmse(fast)  rmse(slow)   [px]")
+    for name, row in quality.items():
+        print(f"  {name:<12} {row['jitter_px']:12.2f} {row['fast_rmse_px']:11.2f} {row['slow_rmse_px']:11.2f}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    failures = check(results, baseline, args.tolerance) + check_filters(quality)
+    for msg in failures:
+        print(f"REGRESSION: {msg}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+# blink_calibration.py
+"""
+Per-user blink threshold calibration. While the user looks at the
+screen and blinks a few times, every frame's blink ratio goes into a
+fixed-size log-ratio histogram (no frame history is kept). The histogram
+is then split into open and closed classes (Otsu), and the threshold is
+placed between the two class means, weighted by their spreads, with a
+hysteresis band on either side.
+
+Can also be run on a recorded clip to tune thresholds offline:
+    python blink_calibration.py clip.mp4 [--seconds 5] [--save]
+"""
+
+import argparse
+import math
+
+import numpy as np
+
+import config
+import utils
+
+class BlinkThresholdEstimator:
+    """Streams blink ratios into a histogram and fits open/closed thresholds."""
+
+    def __init__(self, bins=None, lo=None, hi=None):
+        """Sets up the log-spaced histogram over [lo, hi] blink ratios."""
+        self.bins = config.BLINK_CALIB_BINS if bins is None else bins
+        self.log_lo = math.log(config.BLINK_CALIB_MIN_RATIO if lo is None else lo)
+        self.log_hi = math.log(config.BLINK_CALIB_MAX_RATIO if hi is None else hi)
+        self.scale = self.bins / (self.log_hi - self.log_lo)
+        self.counts = np.zeros(self.bins, dtype=np.int64)
+        self.samples = 0
+        self.reason = None  # --- Why the last fit() failed, for the user.
+
+    def add(self, ratio):
+        """Adds one frame's blink ratio (closed eyes give large ratios)."""
+        if ratio is None or not ratio > 0 or math.isinf(ratio):
+            return
+        i = int((math.log(ratio) - self.log_lo) * self.scale)
+        # --- Out-of-range ratios land in the end bins (a fully closed eye can be huge).
+        self.counts[min(max(i, 0), self.bins - 1)] += 1
+        self.samples += 1
+
+    def fit(self):
+        """
+        Returns {'thresh', 'close', 'open', ...} or None (see self.reason).
+        'close' is the ratio above which an open eye counts as closed and
+        'open' the ratio below which a closed eye counts as open again.
+        """
+        n = self.samples
+        if n < config.BLINK_CALIB_MIN_SAMPLES:
+            self.reason = f"only {n} frames with a face"
+            return None
+
+        # --- Bin centres in log-ratio space.
+        centers = self.log_lo + (np.arange(self.bins) + 0.5) / self.scale
+        p = self.counts / n
+
+        # --- Otsu: the split that maximizes between-class variance.
+        w0 = np.cumsum(p)[:-1]
+        m = np.cumsum(p * centers)[:-1]
+        mu_t = m[-1] + p[-1] * centers[-1]
+        w1 = 1.0 - w0
+        valid = (w0 > 0) & (w1 > 0)
+        between = np.zeros_like(w0)
+        between[valid] = (mu_t * w0[valid] - m[valid]) ** 2 / (w0[valid] * w1[valid])
+        k = int(np.argmax(between))
+
+        # --- Class statistics on either side of the split.
+        open_n = int(self.counts[:k + 1].sum())
+        closed_n = n - open_n
+        if closed_n < config.BLINK_CALIB_MIN_CLOSED:
+            self.reason = "not enough blinks seen"
+            return None
+        if closed_n > open_n:
+            # --- Eyes are open most of the time; this split is not open vs closed.
+            self.reason = "eyes looked closed for most of the calibration"
+            return None
+        mu_o, sd_o = self._class_stats(centers[:k + 1], self.counts[:k + 1])
+        mu_c, sd_c = self._class_stats(centers[k + 1:], self.counts[k + 1:])
+
+        # --- The two classes must actually be apart (d-prime).
+        spread = math.sqrt((sd_o ** 2 + sd_c ** 2) / 2.0) or 1.0 / self.scale
+        separation = (mu_c - mu_o) / spread
+        if separation < config.BLINK_CALIB_MIN_SEPARATION:
+            self.reason = "open and closed eyes look too similar"
+            return None
+
+        # --- Equal z-distance point between the classes, plus the hysteresis band.
+        t = (mu_o * sd_c + mu_c * sd_o) / (sd_o + sd_c) if sd_o + sd_c > 0 else (mu_o + mu_c) / 2.0
+        band = config.BLINK_HYSTERESIS * (mu_c - mu_o)
+        self.reason = None
+        return {
+            'thresh': math.exp(t),
+            'close': math.exp(t + band),
+            'open': math.exp(t - band),
+            'open_ratio': math.exp(mu_o),
+            'closed_ratio': math.exp(mu_c),
+            'separation': separation,
+            'samples': n,
+            'closed_frames': closed_n,
+        }
+
+    @staticmethod
+    def _class_stats(centers, counts):
+        """Mean and standard deviation of one class of the histogram."""
+        total = counts.sum()
+        mean = float((centers * counts).sum() / total)
+        var = float((counts * (centers - mean) ** 2).sum() / total)
+        return mean, math.sqrt(var)
+
+def apply_result(calib, result):
+    """Stores fitted thresholds on the calibration (saved with the profile)."""
+    calib.blink_thresh = result['close']
+    calib.blink_open_thresh = result['open']
+
+def calibrate_clip(source, seconds=None):
+    """Fits thresholds from a recorded clip; returns (result or None, estimator, frame size)."""
+    # --- Imported here so the live app doesn't pull in the replay harness.
+    from face_tracking import FaceTracker
+    from replay import iter_frames
+
+    tracker = FaceTracker(as_array=True, roi_mode=config.ROI_TRACKING)
+    est = BlinkThresholdEstimator()
+    size = None
+    for t, frame in iter_frames(source):
+        if seconds is not None and t > seconds:
+            break
+        size = (frame.shape[1], frame.shape[0])
+        pts = tracker.process_frame(frame)
+        if pts is not None:
+            r_left, r_right = utils.blink_ratios_arr(pts)
+            est.add(utils.detector_ratio(r_left, r_right))
+    return est.fit(), est, size
+
+def main():
+    """Command-line entry point (offline tuning)."""
+    parser = argparse.ArgumentParser(description="Fit blink thresholds from a recorded clip.")
+    parser.add_argument("source", help="video file or directory of frames")
+    parser.add_argument("--seconds", type=float, default=None, help="only use the first N seconds")
+    parser.add_argument("--save", action="store_true", help="store the thresholds in this user's profile")
+    args = parser.parse_args()
+
+    result, est, size = calibrate_clip(args.source, args.seconds)
+    if result is None:
+        print(f"Blink calibration failed: {est.reason}.")
+        return
+    print(f"Frames: {result['samples']} ({result['closed_frames']} closed), "
+          f"separation {result['separation']:.2f}")
+    print(f"Open ratio ~{result['open_ratio']:.2f}, closed ratio ~{result['closed_ratio']:.2f}")
+    print(f"Threshold {result['thresh']:.2f} (close > {result['close']:.2f}, open < {result['open']:.2f})")
+
+    if args.save:
+        from calibration import Calibration
+        from profiles import load_profile, save_profile
+        calib = Calibration()
+        # --- The clip must come from the camera the profile was made with.
+        if not load_profile(calib, size):
+            print("No matching profile to update; calibrate in main.py first.")
+            return
+        apply_result(calib, result)
+        save_profile(calib, size)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+# blink_detector.py
+"""
+Frame-rate independent blink detection. Works on timestamps rather than
+frame counts, so a slow host or frame skipping doesn't change what counts
+as a blink. Open/close hysteresis keeps a ratio hovering at the threshold
+from flickering, and recent events live in a fixed-size ring buffer.
+
+Events:
+- SINGLE / DOUBLE / TRIPLE: a confirmed blink, numbered within the
+  multi-blink window (TRIPLE_BLINK_WINDOW); TRIPLE starts a new count.
+- LONG: the same closure held for LONG_BLINK_MS (sent once, after the blink).
+
+WinkDetector does the same per eye (one eye closed, the other open) from
+the two ratios the gesture loop already has, so winks cost no extra
+inference.
+"""
+
+from enum import Enum
+
+import config
+
+class BlinkEvent(Enum):
+    """Typed blink events emitted by BlinkDetector."""
+    SINGLE = "single"
+    DOUBLE = "double"
+    TRIPLE = "triple"
+    LONG = "long"
+
+# --- Event for the n-th blink inside the multi-blink window.
+_COUNT_EVENTS = {1: BlinkEvent.SINGLE, 2: BlinkEvent.DOUBLE, 3: BlinkEvent.TRIPLE}
+
+class BlinkDetector:
+    """Open/closed state machine over blink ratios, driven by frame timestamps."""
+
+    def __init__(self, min_ms=None, long_ms=None, window=None, history=None):
+        """Reads the timing settings (milliseconds / seconds) from config by default."""
+        self.min_s = (config.BLINK_MIN_MS if min_ms is None else min_ms) / 1000.0
+        self.long_s = (config.LONG_BLINK_MS if long_ms is None else long_ms) / 1000.0
+        self.window = config.TRIPLE_BLINK_WINDOW if window is None else window
+        self.size = config.BLINK_EVENT_HISTORY if history is None else history
+        self.reset()
+
+    def update(self, ratio, t, close_thresh, open_thresh):
+        """Feeds one frame's blink ratio at time t (seconds); returns a BlinkEvent or None."""
+        if self.closed:
+            if ratio < open_thresh:
+                self.closed = False
+                return None
+        elif ratio > close_thresh:
+            self.closed = True
+            self.closed_since = t
+            self.confirmed = self.long_sent = False
+        else:
+            return None
+
+        held = t - self.closed_since
+        if not self.confirmed:
+            # --- Debounce: only a closure that lasts BLINK_MIN_MS is a blink.
+            if held < self.min_s:
+                return None
+            self.confirmed = True
+            event = _COUNT_EVENTS[min(self._recent_blinks(t) + 1, 3)]
+            if event is BlinkEvent.TRIPLE:
+                self.count_from = t
+            return self._push(t, event)
+
+        if not self.long_sent and held >= self.long_s:
+            self.long_sent = True
+            return self._push(t, BlinkEvent.LONG)
+        return None
+
+    def _recent_blinks(self, t):
+        """Blinks (not LONGs) in the ring inside the multi-blink window."""
+        start = max(t - self.window, self.count_from)
+        n = 0
+        for ti, ev in zip(self.times, self.events):
+            if ti > start and ev is not BlinkEvent.LONG and ev is not None:
+                n += 1
+        return n
+
+    def _push(self, t, event):
+        """Stores an event in the ring buffer and returns it."""
+        self.times[self.head] = t
+        self.events[self.head] = event
+        self.head = (self.head + 1) % self.size
+        return event
+
+    def recent(self):
+        """Returns the buffered (time, event) pairs, oldest first."""
+        order = list(range(self.head, self.size)) + list(range(self.head))
+        return [(self.times[i], self.events[i]) for i in order if self.events[i] is not None]
+
+    def reset(self):
+        """Forgets the current closure and the event history."""
+        # --- Current closure.
+        self.closed = False        # --- Hysteresis state: ratio went above close, not yet below open.
+        self.closed_since = 0.0
+        self.confirmed = False     # --- Closure lasted BLINK_MIN_MS and was reported.
+        self.long_sent = False
+
+        # --- Ring buffer of recent (time, event); preallocated, overwritten in place.
+        self.times = [float("-inf")] * self.size
+        self.events = [None] * self.size
+        self.head = 0
+        self.count_from = float("-inf")  # --- Blinks before this don't count (after a TRIPLE).
+
+class WinkEvent(Enum):
+    """Typed wink events emitted by WinkDetector (eyes as in config.left_eye / right_eye)."""
+    LEFT = "left"
+    RIGHT = "right"
+    LEFT_LONG = "left_long"
+    RIGHT_LONG = "right_long"
+
+_SHORT_WINKS = {"left": WinkEvent.LEFT, "right": WinkEvent.RIGHT}
+_LONG_WINKS = {"left": WinkEvent.LEFT_LONG, "right": WinkEvent.RIGHT_LONG}
+
+class WinkDetector:
+    """
+    One eye closed while the other stays open. A short wink is reported
+    when the eye reopens (so it can't be mistaken for the start of a long
+    one); a long wink as soon as it has been held for WINK_LONG_MS.
+    If the other eye closes too, it was a blink and nothing is reported.
+    """
+
+    def __init__(self, min_ms=None, long_ms=None):
+        """Reads the timing settings (milliseconds) from config by default."""
+        self.min_s = (config.WINK_MIN_MS if min_ms is None else min_ms) / 1000.0
+        self.long_s = (config.WINK_LONG_MS if long_ms is None else long_ms) / 1000.0
+        self.reset()
+
+    def update(self, r_left, r_right, t, close_thresh, open_thresh):
+        """Feeds one frame's per-eye blink ratios at time t; returns a WinkEvent or None."""
+        # --- Per-eye open/close hysteresis, same thresholds as blinks.
+        self.left_closed = r_left > (open_thresh if self.left_closed else close_thresh)
+        self.right_closed = r_right > (open_thresh if self.right_closed else close_thresh)
+
+        if self.eye is None:
+            if self.left_closed and self.right_closed:
+                self.eye = "blocked"
+            elif self.left_closed or self.right_closed:
+                self.eye = "left" if self.left_closed else "right"
+                self.since = t
+                self.long_sent = False
+            return None
+
+        if self.eye == "blocked":
+            # --- A blink: wait until both eyes are open again.
+            if not (self.left_closed or self.right_closed):
+                self.eye = None
+            return None
+
+        if self.eye == "left":
+            winking, other = self.left_closed, self.right_closed
+        else:
+            winking, other = self.right_closed, self.left_closed
+        if other:
+            self.eye = "blocked"
+            return None
+
+        held = t - self.since
+        if not winking:
+            eye, self.eye = self.eye, None
+            if not self.long_sent and held >= self.min_s:
+                return _SHORT_WINKS[eye]
+            return None
+        if not self.long_sent and held >= self.long_s:
+            self.long_sent = True
+            return _LONG_WINKS[self.eye]
+        return None
+
+    def reset(self):
+        """Forgets the per-eye state."""
+        self.left_closed = self.right_closed = False
+        self.eye = None    # --- None, "left", "right" or "blocked" (both closed: a blink).
+        self.since = 0.0
+        self.long_sent = False
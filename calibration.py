@@ -4,23 +4,81 @@ Manages the calibration process, storing calibration points
 and handling the mapping from camera coordinates to screen coordinates.
 """
 
+import numpy as np
+
 import config
 import utils
 
+# --- Where each calibration point should land, as normalized screen coordinates.
+SCREEN_TARGETS = {
+    "CENTER": (0.5, 0.5),
+    "TL": (0.0, 0.0),
+    "TR": (1.0, 0.0),
+    "BL": (0.0, 1.0),
+    "BR": (1.0, 1.0),
+}
+
+def _normalize_points(pts):
+    """Hartley normalization: centroid at origin, mean distance sqrt(2)."""
+    centroid = pts.mean(axis=0)
+    dist = np.sqrt(((pts - centroid) ** 2).sum(axis=1)).mean()
+    s = np.sqrt(2.0) / dist if dist > 0 else 1.0
+    return np.array([
+        [s, 0.0, -s * centroid[0]],
+        [0.0, s, -s * centroid[1]],
+        [0.0, 0.0, 1.0],
+    ])
+
+def fit_homography(src, dst):
+    """Least-squares 3x3 homography (DLT) mapping src -> dst; needs 4+ point pairs."""
+    src = np.asarray(src, dtype=np.float64)
+    dst = np.asarray(dst, dtype=np.float64)
+    t_src, t_dst = _normalize_points(src), _normalize_points(dst)
+    s = (t_src @ np.column_stack([src, np.ones(len(src))]).T).T
+    d = (t_dst @ np.column_stack([dst, np.ones(len(dst))]).T).T
+
+    rows = []
+    for (x, y, _), (u, v, _) in zip(s, d):
+        rows.append([-x, -y, -1.0, 0.0, 0.0, 0.0, u * x, u * y, u])
+        rows.append([0.0, 0.0, 0.0, -x, -y, -1.0, v * x, v * y, v])
+    _, _, vt = np.linalg.svd(np.array(rows))
+    H = vt[-1].reshape(3, 3)
+
+    # --- Undo the normalization.
+    H = np.linalg.inv(t_dst) @ H @ t_src
+    if abs(H[2, 2]) < 1e-12:
+        return None
+    return H / H[2, 2]
+
 class Calibration:
     """Holds the calibration state and all related logic."""
-    
+
     def __init__(self):
         """Initializes the calibration state variables."""
         self.cam_pts = {}
         self.labels = ["CENTER", "TL", "TR", "BL", "BR"]
         self.stage = -1  # -1 = inactive, 0-4 = calibrating
         self.calibrated = False
+        self.mode = config.CALIB_MODE
+        self.space = config.CURSOR_MODE  # --- "nose" pixels or "head_pose" degrees
+        # --- Per-user tuning; starts from config and is saved with the profile.
+        self.sens_x, self.sens_y = config.SENS_X, config.SENS_Y
+        self.blink_thresh = config.BLINK_THRESH       # --- closes above this ratio
+        self.blink_open_thresh = config.BLINK_THRESH  # --- reopens below this (hysteresis)
+        # --- Fitted camera -> screen-pixel mapping, computed once on completion.
+        self.homography = None  # camera -> normalized screen (what profiles store)
+        self.matrix = None   # 3x3 homography with sensitivity/screen scaling (homography mode)
+        self.bounds = None   # (left, right, top, bottom) (linear mode)
+        self._coeffs = None  # matrix as 9 Python floats for the per-frame path
 
     def start(self):
         """Resets and starts the calibration process when 'c' is pressed."""
         self.stage = 0
         self.calibrated = False
+        self.homography = None
+        self.matrix = None
+        self.bounds = None
+        self._coeffs = None
         self.cam_pts.clear()
         print("Calibration started.")
         return "Calibration started. Look at center then corners and press 1 to 5."
@@ -31,16 +89,19 @@ class Calibration:
         if not (0 <= self.stage < 5):
             return None
 
-        # --- Get the label (e.g., "TL") and store the nose coordinates.
+        # --- Get the label (e.g., "TL") and store the control point (nose or head pose).
         label = self.labels[self.stage]
         self.cam_pts[label] = point_coords
         print(f"✓ {label} point captured: {point_coords}")
-        
+
         # --- Advance to the next stage.
         self.stage += 1
-        
-        # --- If all 5 points are set, mark as calibrated and return.
+
+        # --- If all 5 points are set, fit the mapping and mark as calibrated.
         if self.stage == 5:
+            if not self.fit():
+                print("✗ Calibration points are degenerate.")
+                return "Calibration failed. Press c to try again."
             self.calibrated = True
             print("✓ Calibration complete.")
             return "Calibration complete."
@@ -48,6 +109,87 @@ class Calibration:
             # --- Otherwise, return feedback for the next step.
             return f"{label} captured. Look at {self.labels[self.stage]} and press {self.stage+1}."
 
+    def fit_bounds(self):
+        """Stores the TL/TR/BL head-movement box (linear mode and fallback)."""
+        # --- Get the calibrated boundaries of head movement.
+        left = self.cam_pts["TL"][0]
+        right = self.cam_pts["TR"][0]
+        top = self.cam_pts["TL"][1]
+        bottom = self.cam_pts["BL"][1]
+        self.bounds = None if (right == left or bottom == top) else (left, right, top, bottom)
+
+    def fit(self):
+        """Precomputes the camera -> screen mapping from the captured points."""
+        self.fit_bounds()
+        self.homography = self.matrix = self._coeffs = None
+        if self.mode == "homography":
+            src = [self.cam_pts[label] for label in self.labels]
+            dst = [SCREEN_TARGETS[label] for label in self.labels]
+            try:
+                H = fit_homography(src, dst)
+            except np.linalg.LinAlgError:
+                H = None
+            if H is not None and np.linalg.cond(H) < 1e12:
+                self._set_homography(H)
+            else:
+                print("Homography fit failed; using the linear corner mapping.")
+
+        return self.matrix is not None or self.bounds is not None
+
+    def _set_homography(self, H):
+        """Caches H and the per-frame matrix with sensitivity and screen scaling folded in."""
+        # --- screen = (0.5 + (n - 0.5) * SENS) * SIZE, an affine step after H.
+        S = np.array([
+            [self.sens_x * utils.SCREEN_W, 0.0, 0.5 * (1.0 - self.sens_x) * utils.SCREEN_W],
+            [0.0, self.sens_y * utils.SCREEN_H, 0.5 * (1.0 - self.sens_y) * utils.SCREEN_H],
+            [0.0, 0.0, 1.0],
+        ])
+        self.homography = H
+        self.matrix = S @ H
+        self._coeffs = tuple(self.matrix.ravel().tolist())
+
+    def to_dict(self):
+        """Returns the calibration result as plain JSON-friendly data."""
+        return {
+            'mode': self.mode,
+            'space': self.space,
+            'points': {label: [float(v) for v in pt] for label, pt in self.cam_pts.items()},
+            'homography': None if self.homography is None else self.homography.tolist(),
+            'sens': [self.sens_x, self.sens_y],
+            'blink_thresh': self.blink_thresh,
+            'blink_open_thresh': self.blink_open_thresh,
+        }
+
+    def load_dict(self, data):
+        """Restores a saved calibration without refitting when possible; returns True on success."""
+        if data.get('space', "nose") != self.space:
+            print(f"Profile was calibrated for cursor mode '{data.get('space', 'nose')}'; recalibrate.")
+            return False
+        points = data['points']
+        if any(label not in points for label in self.labels):
+            return False
+        self.cam_pts = {label: tuple(points[label]) for label in self.labels}
+        # --- config.CALIB_MODE wins; the saved points are simply refitted in that mode.
+        saved_mode = data.get('mode', self.mode)
+        if saved_mode != self.mode:
+            print(f"Profile was fitted with '{saved_mode}' mapping; refitting as '{self.mode}' (config.CALIB_MODE).")
+        self.sens_x, self.sens_y = data.get('sens', (self.sens_x, self.sens_y))
+        self.blink_thresh = data.get('blink_thresh', self.blink_thresh)
+        self.blink_open_thresh = data.get('blink_open_thresh', self.blink_thresh)
+
+        H = data.get('homography')
+        if self.mode == "homography" and saved_mode == "homography" and H is not None:
+            # --- Reuse the saved fit; only the screen scaling is rebuilt.
+            self.fit_bounds()
+            self._set_homography(np.array(H, dtype=np.float64))
+            ok = True
+        else:
+            ok = self.fit()
+
+        self.calibrated = ok
+        self.stage = 5 if ok else -1
+        return ok
+
     def get_overlay_text(self):
         """Returns the appropriate instructional text for the camera overlay."""
         # --- Show calibration step instructions.
@@ -61,30 +203,49 @@ class Calibration:
     def map_to_screen(self, x, y):
         """Maps a camera coordinate (x, y) to a screen coordinate."""
         # --- Don't move the mouse if not calibrated.
-        if not self.calibrated or len(self.cam_pts) < 5:
+        if not self.calibrated:
             return None
 
-        # --- Get the calibrated boundaries of head movement.
-        left = self.cam_pts["TL"][0]
-        right = self.cam_pts["TR"][0]
-        top = self.cam_pts["TL"][1]
-        bottom = self.cam_pts["BL"][1]
+        coeffs = self._coeffs
+        if coeffs is not None:
+            # --- One projective multiply, written out in scalars for a single point.
+            a, b, c, d, e, f, g, h, i = coeffs
+            w = g * x + h * y + i
+            if w == 0:
+                return None
+            sx = (a * x + b * y + c) / w
+            sy = (d * x + e * y + f) / w
+            # --- Clamp values to prevent going off-screen.
+            sx = max(0.0, min(float(utils.SCREEN_W), sx))
+            sy = max(0.0, min(float(utils.SCREEN_H), sy))
+            return int(sx), int(sy)
 
-        # --- Prevent division by zero if calibration is bad.
-        if right == left or bottom == top:
+        if self.bounds is None:
             return None
+        left, right, top, bottom = self.bounds
 
         # --- Normalize coordinates to a 0.0-1.0 range.
         nx = (x - left) / (right - left)
         ny = (y - top) / (bottom - top)
 
-        # --- Apply sensitivity from the config file.
-        nx = 0.5 + (nx - 0.5) * config.SENS_X
-        ny = 0.5 + (ny - 0.5) * config.SENS_Y
+        # --- Apply the sensitivity (from config or the loaded profile).
+        nx = 0.5 + (nx - 0.5) * self.sens_x
+        ny = 0.5 + (ny - 0.5) * self.sens_y
 
         # --- Clamp values to prevent going off-screen.
         nx = max(0.0, min(1.0, nx))
         ny = max(0.0, min(1.0, ny))
 
         # --- Scale the 0.0-1.0 value to the full screen resolution.
-        return int(nx * utils.SCREEN_W), int(ny * utils.SCREEN_H)
\ No newline at end of file
+        return int(nx * utils.SCREEN_W), int(ny * utils.SCREEN_H)
+
+    def map_points(self, pts):
+        """Vectorized map_to_screen for an (N, 2) array; returns float (N, 2) or None."""
+        if not self.calibrated or self.matrix is None:
+            return None
+        pts = np.asarray(pts, dtype=np.float64)
+        v = np.column_stack([pts, np.ones(len(pts))]) @ self.matrix.T
+        out = v[:, :2] / v[:, 2:3]
+        np.clip(out[:, 0], 0.0, utils.SCREEN_W, out=out[:, 0])
+        np.clip(out[:, 1], 0.0, utils.SCREEN_H, out=out[:, 1])
+        return out
@@ -0,0 +1,116 @@
+# camera.py
+"""
+Runs the OpenCV camera capture on its own thread so frame grabbing
+never waits on face tracking, mouse control, or the preview window.
+"""
+
+import cv2
+import threading
+import time
+
+import config
+
+class CameraStream:
+    """Grabs camera frames in the background into a latest-frame-wins slot."""
+
+    def __init__(self, src=None):
+        """Opens the camera and prepares the shared frame slot."""
+        self.src = config.CAM_INDEX if src is None else src
+        self.cap = cv2.VideoCapture(self.src)
+        # --- Ask the driver to keep as few frames queued as possible.
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+        self._cond = threading.Condition()
+        self._frame = None
+        self._frame_time = 0.0
+        self._seq = 0        # --- Sequence number of the newest grabbed frame.
+        self._read_seq = 0   # --- Sequence number of the last frame handed out.
+        self._thread = None
+        self.running = False
+
+        # --- Public stats for the consumer.
+        self.frames_grabbed = 0
+        self.frames_dropped = 0
+        self.read_failures = 0
+        self.last_timestamp = 0.0
+
+    def isOpened(self):
+        """Mirrors cv2.VideoCapture.isOpened() so callers can swap us in."""
+        return self.cap.isOpened()
+
+    def start(self):
+        """Starts the background capture thread and returns self."""
+        if self.running:
+            return self
+        self.running = True
+        self._thread = threading.Thread(target=self._update, daemon=True)
+        self._thread.start()
+        return self
+
+    def _update(self):
+        """Capture loop: always overwrites the slot with the newest frame."""
+        failures = 0
+        while self.running:
+            ok, frame = self.cap.read()
+            now = time.perf_counter()
+            if not ok:
+                self.read_failures += 1
+                failures += 1
+                # --- A hiccup is retried; a camera that keeps failing is gone, so stop.
+                if failures >= config.CAM_MAX_READ_FAILURES:
+                    print(f"Camera {self.src} stopped after {failures} failed reads.")
+                    with self._cond:
+                        self.running = False
+                        self._cond.notify_all()
+                    return
+                time.sleep(0.05)
+                continue
+            failures = 0
+
+            with self._cond:
+                # --- The previous frame was never read, so it is dropped.
+                if self._seq > self._read_seq:
+                    self.frames_dropped += 1
+                self._frame = frame
+                self._frame_time = now
+                self._seq += 1
+                self.frames_grabbed += 1
+                self._cond.notify_all()
+
+    def read(self, timeout=None):
+        """
+        Waits for a frame newer than the last one read; returns (ok, frame).
+        ok is False on a timeout too; check 'running' to tell that from a stopped stream.
+        """
+        timeout = config.CAM_READ_TIMEOUT if timeout is None else timeout
+        with self._cond:
+            # --- Block until the capture thread publishes a fresh frame.
+            if not self._cond.wait_for(lambda: self._seq > self._read_seq or not self.running, timeout):
+                return False, None
+            if self._seq == self._read_seq:
+                return False, None
+            self._read_seq = self._seq
+            self.last_timestamp = self._frame_time
+            return True, self._frame
+
+    def frame_size(self):
+        """Returns the (width, height) the camera is delivering."""
+        return (int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+
+    def get_stats(self):
+        """Returns a snapshot of the capture counters."""
+        return {
+            'grabbed': self.frames_grabbed,
+            'dropped': self.frames_dropped,
+            'read_failures': self.read_failures,
+        }
+
+    def release(self):
+        """Stops the capture thread and releases the camera."""
+        self.running = False
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+        self.cap.release()
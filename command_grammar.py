@@ -0,0 +1,92 @@
+# command_grammar.py
+"""
+Builds the closed command vocabulary that VoiceController._execute_command
+understands (fixed commands plus "open"/"close" for every config.APPS
+entry) so offline recognizers can be constrained to it: a Vosk grammar
+or PocketSphinx keyword list. Constrained decoding only has to choose
+between a few dozen phrases, so it is faster and far less likely to
+mishear a command than open-vocabulary recognition.
+
+The phrase list is rebuilt automatically whenever config.APPS changes
+(checked by a fingerprint of its keys). Keep FIXED_PHRASES in step with
+the router in voice_assistant.py.
+"""
+
+import hashlib
+import json
+
+import config
+
+# --- Commands that don't depend on config.APPS.
+FIXED_PHRASES = [
+    # --- Meta commands (handled in _voice_listener_loop).
+    "exit voice", "stop listening", "quit assistant", "shutdown assistant",
+    # --- Web / info.
+    "open youtube", "what time is it",
+    # --- Mouse.
+    "click", "double click", "scroll up", "scroll down",
+    # --- System actions.
+    "close window", "lock", "shutdown", "restart", "screenshot",
+    "volume up", "volume down", "mute", "show desktop", "minimize all",
+]
+
+# --- Prefixes followed by free text; the grammar can't cover these, so
+# --- they go back to open-vocabulary recognition.
+OPEN_PREFIXES = ["search google for"]
+
+UNKNOWN = "[unk]"
+
+def apps_fingerprint(apps=None):
+    """Short hash of the app names (paths don't change the vocabulary)."""
+    apps = config.APPS if apps is None else apps
+    return hashlib.sha1("\n".join(sorted(apps)).encode("utf-8")).hexdigest()[:12]
+
+def build_phrases(apps=None):
+    """Every phrase the router accepts, app commands included."""
+    apps = config.APPS if apps is None else apps
+    phrases = list(FIXED_PHRASES)
+    for app in sorted(apps):
+        phrases += [f"open {app}", f"close {app}"]
+    # --- The prefix words alone let the grammar flag a search for the open-vocabulary pass.
+    phrases += OPEN_PREFIXES
+    return phrases
+
+class CommandGrammar:
+    """Caches the phrase list and its recognizer encodings per APPS fingerprint."""
+
+    def __init__(self):
+        self.fingerprint = None
+        self.phrases = []
+        self.vosk_json = ""
+
+    def refresh(self):
+        """Rebuilds the grammar if config.APPS changed; returns True if it did."""
+        fp = apps_fingerprint()
+        if fp == self.fingerprint:
+            return False
+        self.fingerprint = fp
+        self.phrases = build_phrases()
+        # --- Vosk grammar: a JSON list of phrases; [unk] absorbs anything else.
+        self.vosk_json = json.dumps(self.phrases + [UNKNOWN])
+        print(f"Command grammar built: {len(self.phrases)} phrases (apps {fp}).")
+        return True
+
+    def vosk(self):
+        """The Vosk grammar string, rebuilt first if needed."""
+        self.refresh()
+        return self.vosk_json
+
+    def keywords(self, sensitivity=None):
+        """PocketSphinx keyword_entries, rebuilt first if needed."""
+        self.refresh()
+        s = config.SPHINX_KEYWORD_SENSITIVITY if sensitivity is None else sensitivity
+        return [(phrase, s) for phrase in self.phrases]
+
+    def is_complete(self, text):
+        """True if text is a whole command and no longer command starts with it."""
+        self.refresh()
+        return text in self.phrases and not any(p.startswith(text + " ") for p in self.phrases)
+
+    def needs_open_pass(self, text):
+        """True when the constrained result can't be used as-is."""
+        return not text or UNKNOWN in text or any(text.startswith(p) for p in OPEN_PREFIXES)
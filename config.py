@@ -9,19 +9,192 @@ and application paths for the assistant.
 SMOOTHING = 0.2
 SENS_X, SENS_Y = 0.6, 0.6
 BLINK_THRESH = 5.5
-BLINK_LIMIT = 2
+BLINK_MIN_MS = 30            # --- Eyes must stay closed this long to count as a blink
+LONG_BLINK_MS = 800          # --- A closure this long also sends a LONG blink event
+LONG_BLINK_ACTION = "none"   # --- "none", "double_click" or "right_click"
 TRIPLE_BLINK_WINDOW = 2.0
+BLINK_EVENT_HISTORY = 16     # --- Ring buffer size for recent blink events
+
+# ===== Calibration =====
+# --- "homography": fit a perspective map from all 5 calibration points (once, on completion).
+# --- "linear": the original TL/TR/BL corner normalization.
+CALIB_MODE = "homography"
+# --- What the cursor follows: "nose" (pixel position) or "head_pose" (yaw/pitch via solvePnP).
+# --- Calibration (and the saved profile) is specific to the mode.
+CURSOR_MODE = "nose"
+HEAD_POSE_REFINE_ITERS = 1  # --- LM steps per frame when warm-starting from the last pose
+
+# ===== Calibration Profiles =====
+# --- Calibration is saved per user and camera and reloaded at startup.
+PROFILE_ENABLED = True
+PROFILE_DIR = "profiles"
+PROFILE_USER = None  # None = the OS login name
+
+# ===== Wink Gestures =====
+# --- One eye closed, the other open. Short winks fire on reopening, long ones while held.
+WINKS_ENABLED = True
+WINK_MIN_MS = 150
+WINK_LONG_MS = 700
+# --- Actions: "right_click", "double_click", "drag" (toggle), "scroll" (toggle mode) or "none".
+WINK_ACTIONS = {
+    "left": "right_click",
+    "right": "drag",
+    "left_long": "scroll",
+    "right_long": "none",
+}
+SCROLL_SPEED = 2.5     # --- Scroll units per second per screen pixel of head offset
+SCROLL_DEADZONE = 40   # --- Screen pixels around the scroll-mode anchor that don't scroll
+SCROLL_STEP = 100      # --- Smallest scroll amount sent (about one wheel click)
+
+# ===== Dwell Click =====
+# --- Click by holding the cursor still (for users who can't blink reliably). Toggle with 'd'.
+DWELL_ENABLED = False
+DWELL_TIME = 1.0         # --- Seconds to hold still before the click
+DWELL_RADIUS = 30        # --- Screen pixels the cursor may wander while dwelling
+DWELL_MAX_SPEED = 150.0  # --- Screen px/s; faster movement restarts the dwell
+DWELL_BUFFER = 15        # --- Recent positions used for the speed estimate
+
+# ===== Blink Threshold Calibration =====
+# --- Press 'b' and blink a few times; the threshold is fitted from the ratios seen.
+BLINK_CALIB_SECONDS = 6.0
+BLINK_HYSTERESIS = 0.15          # --- Band around the threshold, as a fraction of the open/closed gap
+BLINK_CALIB_BINS = 200           # --- Log-spaced histogram bins
+BLINK_CALIB_MIN_RATIO = 1.0
+BLINK_CALIB_MAX_RATIO = 60.0
+BLINK_CALIB_MIN_SAMPLES = 60     # --- Frames with a face
+BLINK_CALIB_MIN_CLOSED = 4       # --- Closed-eye frames
+BLINK_CALIB_MIN_SEPARATION = 4.0 # --- d-prime between open and closed ratios (a split single peak is ~2.7)
+
+# ===== Cursor Filter =====
+# --- "one_euro" (adaptive), "kalman" (constant velocity) or "ema" (fixed SMOOTHING).
+CURSOR_FILTER = "one_euro"
+ONE_EURO_MIN_CUTOFF = 0.5        # Hz; lower = steadier when still
+ONE_EURO_BETA = 0.02             # how fast the cutoff rises with speed (per px/s)
+ONE_EURO_D_CUTOFF = 1.0          # Hz; smoothing of the speed estimate
+KALMAN_PROCESS_NOISE = 50000.0   # px^2/s^3; higher = follows fast moves sooner
+KALMAN_MEASUREMENT_NOISE = 25.0  # px^2; expected jitter of the mapped nose point
+
+# ===== Mouse Output =====
+# --- "auto" (direct OS backend), "pyautogui", "win32", "xlib" or "null".
+MOUSE_BACKEND = "auto"
+XLIB_SCROLL_UNIT = 100  # scroll amount per X11 wheel click (pyautogui-style units)
+CURSOR_THREAD_ENABLED = True     # move the cursor from its own fixed-rate thread
+CURSOR_RATE_HZ = 120
+CURSOR_INTERVAL_SMOOTHING = 0.2  # EMA factor for the measured time between targets
+CURSOR_MAX_GLIDE = 0.1           # longest glide toward one target (seconds)
 
 # ===== Camera Settings =====
 # --- Hardware settings for which camera to use and the preview window size.
 CAM_INDEX = 0
 CAM_WIN_W, CAM_WIN_H = 320, 240
+CAM_READ_TIMEOUT = 1.0  # seconds to wait for a fresh frame from the capture thread
+CAM_MAX_READ_FAILURES = 100  # consecutive failed grabs (~5 s) before the stream stops itself
+
+# ===== Pipeline Settings =====
+# --- Run capture, color convert, inference and gestures on overlapping threads.
+PIPELINE_ENABLED = True
+PIPELINE_QUEUE_SIZE = 2  # frames buffered between stages (oldest dropped when full)
+
+# ===== Metrics Settings =====
+# --- Per-stage latency timers, preview overlay and periodic dump (toggle with 'm').
+METRICS_ENABLED = False
+METRICS_OVERLAY = True
+METRICS_WINDOW = 300             # samples kept per stage for p50/p95/p99
+METRICS_DUMP_PATH = "metrics.json"  # .json = latest snapshot, .csv = appended rows
+METRICS_DUMP_INTERVAL = 5.0      # seconds between dumps
+
+# ===== Motion-to-Photon Measurement =====
+# --- Record capture-to-cursor-move latency and print a report on exit.
+LATENCY_MODE = False
+LATENCY_REPORT_PATH = "latency_report.json"
+LATENCY_MAX_SAMPLES = 100000
+LATENCY_BIN_MS = 5
+
+# ===== Adaptive Frame Skipping =====
+# --- When FaceMesh can't keep up, run it every Nth frame and extrapolate in between.
+FRAME_SKIP_ENABLED = True
+TARGET_FPS = 30
+MAX_FRAME_SKIP = 3              # at most 1 inference per 3 frames
+SKIP_TIMING_SMOOTHING = 0.1     # EMA factor for the measured frame timings
+SKIP_VELOCITY_SMOOTHING = 0.5   # EMA factor for the extrapolated nose/control velocity
+MAX_EXTRAPOLATION = 0.15        # never extrapolate further than this (seconds)
 
 # ===== MediaPipe Landmark Indices =====
 # --- Specific landmark IDs from the MediaPipe model for tracking features.
 nose_idx = [1, 2, 4]
 left_eye = [33, 160, 158, 133, 153, 144]
 right_eye = [362, 385, 387, 263, 373, 380]
+pose_idx = [1, 152, 33, 263, 61, 291]  # nose tip, chin, eye outer corners, mouth corners
+roi_idx = [10, 152, 234, 454]  # forehead, chin, cheeks: the face's extent for the ROI crop
+# --- Return an (N, 3) pixel-space array instead of MediaPipe landmarks.
+# --- Off by default: for the few points a frame reads, the plain loops are faster.
+LANDMARK_ARRAYS = False
+LANDMARK_BUFFERS = 8    # preallocated arrays cycled so pipeline stages never share one
+
+# ===== Face ROI Tracking =====
+# --- Run FaceMesh on a crop around the last face instead of the full frame.
+# --- Off by default: crops go to a static-image FaceMesh, which runs face detection on
+# --- every call, while the video-mode model already tracks its own ROI without it.
+# --- Turn on only if replay.py shows a gain on your camera.
+ROI_TRACKING = False
+ROI_MARGIN = 0.3     # padding on each side, as a fraction of the face size
+ROI_MIN_SIZE = 80    # smallest face box (pixels) used to build the crop
+ROI_RETRY_FRAMES = 5  # after a crop misses the face, run this many frames on the full frame
+
+# ===== Replay Settings =====
+# --- Screen size assumed when no display is available (headless replay).
+HEADLESS_SCREEN_W, HEADLESS_SCREEN_H = 1920, 1080
+REPLAY_CALIB_SPAN = 80  # px around the first nose point used as auto-calibration corners
+REPLAY_POSE_SPAN = 15   # degrees of yaw/pitch for the same box in head_pose mode
+
+# ===== Voice Audio Stream =====
+# --- The microphone stays open; utterances are cut from the stream by energy.
+AUDIO_STREAM_ENABLED = True
+AUDIO_RATE = 16000
+AUDIO_CHUNK_MS = 30
+AUDIO_BUFFER_SECONDS = 10.0   # --- Ring buffer length (must exceed AUDIO_MAX_UTTERANCE + AUDIO_PREROLL)
+AUDIO_WARMUP_SECONDS = 0.5    # --- Initial noise-floor estimate, once at startup
+AUDIO_FLOOR_ADAPT = 0.05      # --- How fast the noise floor follows non-speech audio
+AUDIO_SPEECH_RATIO = 3.0      # --- Speech = RMS this many times the noise floor...
+AUDIO_MIN_RMS = 150           # --- ...and at least this loud (int16 RMS)
+AUDIO_END_SILENCE = 0.6       # --- Seconds of quiet that end an utterance
+AUDIO_MIN_SPEECH = 0.2        # --- Shorter bursts are dropped as noise
+AUDIO_PREROLL = 0.3           # --- Audio kept from before speech was detected
+AUDIO_MAX_UTTERANCE = 4.0     # --- Same limit as the old phrase_time_limit
+AUDIO_ERROR_BACKOFF = 0.05    # --- First wait after a failed read; doubles per failure...
+AUDIO_ERROR_BACKOFF_MAX = 1.0 # --- ...up to this many seconds
+AUDIO_MAX_ERRORS = 10         # --- Consecutive failed reads before the stream gives up
+
+# ===== Voice Activity Detection =====
+# --- Loud segments must also contain speech (vad.py) before they reach the recognizer.
+VAD_BACKEND = "spectral"      # --- "spectral", "webrtc" (needs webrtcvad) or None to disable
+VAD_MIN_VOICED = 0.15         # --- Seconds of speech-like chunks a segment needs
+VAD_BAND_LOW, VAD_BAND_HIGH = 300, 3400   # --- Speech band (Hz)
+VAD_MIN_BAND_RATIO = 0.1      # --- Fraction of chunk energy inside the band (hum and rumble are ~0)
+VAD_PITCH_MIN, VAD_PITCH_MAX = 60, 400   # --- Voice pitch range (Hz)
+VAD_MIN_PERIODICITY = 0.5     # --- Autocorrelation peak at the pitch period (noise mostly < 0.4)
+VAD_WEBRTC_MODE = 2           # --- 0 (permissive) to 3 (strict)
+
+# ===== Speech Recognition =====
+# --- "google" (online), "vosk" (offline, needs a model folder) or "sphinx" (offline).
+SPEECH_BACKEND = "vosk"
+SPEECH_FALLBACK = "google"   # --- Used while the main backend loads or if it fails; None to disable
+SPEECH_LANGUAGE = "en-in"    # --- Google language code
+VOSK_MODEL_PATH = "models/vosk-model-small-en-us-0.15"
+# --- Constrain offline backends to the command vocabulary (command_grammar.py);
+# --- unmatched speech and "search google for ..." get a second, open-vocabulary pass.
+SPEECH_GRAMMAR = True
+SPHINX_KEYWORD_SENSITIVITY = 0.8   # --- 0-1; higher catches more keywords but more false hits
+
+# ===== Streaming Commands =====
+# --- With a streaming backend (vosk) and the audio stream, decode while the user is
+# --- still speaking and run these commands as soon as the partial result is one of
+# --- them, instead of waiting for the end-of-utterance silence. Only commands that can be
+# --- undone if the final result disagrees (voice_assistant.EARLY_UNDO) may be listed;
+# --- clicks can't be taken back, so they always wait for the final result.
+STREAM_COMMANDS = True
+STREAM_EARLY_COMMANDS = ["scroll up", "scroll down", "volume up", "volume down"]
+STREAM_STABLE_PARTIALS = 2   # --- Same partial this many chunks in a row before acting
 
 # ===== Application Database =====
 # --- Maps spoken app names to their executable file paths on the system.
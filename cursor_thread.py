@@ -0,0 +1,95 @@
+# cursor_thread.py
+"""
+A dedicated cursor-output thread. The vision loop only publishes the
+latest smoothed target; this thread moves the mouse at a fixed rate
+(e.g. 120 Hz), gliding from the current position to each new target
+over roughly one camera-frame interval, so motion looks continuous
+even at 15-30 FPS.
+"""
+
+import threading
+import time
+
+import config
+import utils
+
+class CursorThread:
+    """Moves the mouse at CURSOR_RATE_HZ toward the latest published target."""
+
+    def __init__(self, mouse, rate_hz=None, latency=None):
+        """Stores the mouse backend, the tick rate and an optional LatencyRecorder."""
+        rate_hz = config.CURSOR_RATE_HZ if rate_hz is None else rate_hz
+        self.mouse = mouse
+        self.period = 1.0 / rate_hz
+        self.latency = latency
+
+        # --- Latest-value slot: one tuple (x, y, t_published, t_capture).
+        # --- Replacing a reference is atomic under the GIL, so no lock is needed.
+        self._slot = None
+        self._thread = None
+        self.running = False
+        self.ticks = 0
+
+    def set_target(self, x, y, t_capture=None):
+        """Publishes a new cursor target (called from the vision loop)."""
+        self._slot = (float(x), float(y), time.perf_counter(), t_capture)
+
+    def start(self):
+        """Starts the cursor thread and returns self."""
+        self.running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stops the cursor thread."""
+        self.running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+
+    def _run(self):
+        """Fixed-rate loop: interpolate from the segment start toward the target."""
+        current = None        # --- Slot being interpolated toward.
+        pos = None            # --- Last position we sent (x, y).
+        start = None          # --- Where the current glide began.
+        seg_start = 0.0
+        frame_dt = None       # --- Smoothed interval between targets (seconds).
+        pending_capture = None
+        next_tick = time.perf_counter()
+
+        while self.running:
+            now = time.perf_counter()
+            slot = self._slot
+
+            # --- New target: glide to it over about one frame interval.
+            if slot is not None and slot is not current:
+                if current is not None:
+                    frame_dt = utils.smooth_val(frame_dt, slot[2] - current[2], config.CURSOR_INTERVAL_SMOOTHING)
+                current = slot
+                start = pos if pos is not None else (slot[0], slot[1])
+                seg_start = now
+                pending_capture = slot[3]
+
+            if current is not None:
+                duration = min(max(frame_dt or self.period, self.period), config.CURSOR_MAX_GLIDE)
+                a = min(1.0, (now - seg_start) / duration)
+                pos = (start[0] + (current[0] - start[0]) * a,
+                       start[1] + (current[1] - start[1]) * a)
+                try:
+                    moved = self.mouse.move_to(pos[0], pos[1])
+                except Exception:
+                    moved = False # Ignore occasional errors
+
+                # --- First real move toward a new frame's target closes its latency sample.
+                if moved and pending_capture and self.latency:
+                    self.latency.record(pending_capture)
+                    pending_capture = None
+
+            self.ticks += 1
+            next_tick += self.period
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # --- Fell behind (e.g. a slow move call): don't try to catch up.
+                next_tick = time.perf_counter()
@@ -0,0 +1,86 @@
+# dwell.py
+"""
+Dwell clicking: when the smoothed cursor stays inside a small radius
+for DWELL_TIME seconds, click once. Cursor speed comes from running
+sums over a fixed ring buffer of recent positions, so each frame costs
+O(1) no matter how long the buffer is.
+"""
+
+import math
+
+import config
+
+class DwellClicker:
+    """Tracks cursor speed and dwell time; update() says when to click."""
+
+    def __init__(self, dwell_time=None, radius=None, max_speed=None, size=None):
+        """Reads the dwell settings from config by default."""
+        self.dwell_time = config.DWELL_TIME if dwell_time is None else dwell_time
+        self.radius = config.DWELL_RADIUS if radius is None else radius
+        self.max_speed = config.DWELL_MAX_SPEED if max_speed is None else max_speed
+        self.size = config.DWELL_BUFFER if size is None else size
+        self.reset()
+
+    def reset(self):
+        """Clears the buffer and any dwell in progress."""
+        # --- Ring buffer of (x, y, t) and the step length that led to each sample.
+        self.xs = [0.0] * self.size
+        self.ys = [0.0] * self.size
+        self.ts = [0.0] * self.size
+        self.steps = [0.0] * self.size
+        self.head = 0
+        self.count = 0
+        self.path = 0.0  # --- Running sum of step lengths in the buffer.
+
+        self.anchor = None    # --- Where the current dwell started.
+        self.start = 0.0
+        self.fired = False    # --- Already clicked for this dwell; wait for movement.
+        self.progress = 0.0   # --- 0..1, for the progress ring.
+
+    def speed(self):
+        """Mean cursor speed over the buffer in px/s."""
+        if self.count < 2:
+            return 0.0
+        oldest = (self.head - self.count) % self.size
+        newest = (self.head - 1) % self.size
+        span = self.ts[newest] - self.ts[oldest]
+        # --- The oldest sample's step leads in from outside the window.
+        path = self.path - self.steps[oldest]
+        return path / span if span > 0 else 0.0
+
+    def _push(self, x, y, t):
+        """Adds a sample, evicting the oldest when full, and updates the running sum."""
+        step = 0.0
+        if self.count:
+            prev = (self.head - 1) % self.size
+            step = math.hypot(x - self.xs[prev], y - self.ys[prev])
+        if self.count == self.size:
+            self.path -= self.steps[self.head]
+        else:
+            self.count += 1
+        self.xs[self.head], self.ys[self.head], self.ts[self.head] = x, y, t
+        self.steps[self.head] = step
+        self.path += step
+        self.head = (self.head + 1) % self.size
+
+    def update(self, x, y, t):
+        """Feeds the cursor position at time t; returns True when a click is due."""
+        self._push(x, y, t)
+
+        moving = self.speed() > self.max_speed
+        if moving or self.anchor is None or math.hypot(x - self.anchor[0], y - self.anchor[1]) > self.radius:
+            # --- Moved away (or too fast): start a new dwell here.
+            self.anchor = (x, y)
+            self.start = t
+            self.fired = False
+            self.progress = 0.0
+            return False
+
+        if self.fired:
+            return False
+        self.progress = min(1.0, (t - self.start) / self.dwell_time)
+        if self.progress >= 1.0:
+            self.fired = True
+            self.progress = 0.0
+            return True
+        return False
@@ -6,36 +6,178 @@ and processing video frames to find facial landmarks.
 
 import cv2
 import mediapipe as mp
+import numpy as np
+
+import config
+import utils
+from metrics import Metrics
 
 class FaceTracker:
     """Wraps the MediaPipe FaceMesh model into a simple class."""
 
-    def __init__(self, refine_landmarks=True):
+    def __init__(self, refine_landmarks=True, as_array=False, roi_mode=False, metrics=None, indices=None):
         """Initializes and loads the FaceMesh machine learning model."""
         mp_face = mp.solutions.face_mesh
         # --- We set refine_landmarks=True to get all 478 face points (needed for eyes).
         self.face_mesh = mp_face.FaceMesh(refine_landmarks=refine_landmarks)
         self.landmarks = None
+        self.metrics = metrics or Metrics(enabled=False)
+
+        # --- Optionally return landmarks as an (N, 3) float32 pixel-space array.
+        # --- A small ring of preallocated buffers lets pipeline stages hold on
+        # --- to a frame's array while the next frame is being filled.
+        # --- Only the rows in 'indices' (plus utils.TRACKED_IDX) are filled in: copying
+        # --- all 478 protobuf landmarks costs far more than the math done on them.
+        # --- The other rows stay NaN, so reading an untracked landmark can't pass unnoticed.
+        self.as_array = as_array
+        idx = utils.TRACKED_IDX if indices is None else np.union1d(utils.TRACKED_IDX, indices)
+        self.indices = idx
+        self._idx_list = idx.tolist()
+        self._rows = np.zeros((len(idx), 3), np.float32)  # --- Staging area for the tracked rows
+        self._flat = self._rows.reshape(-1)
+        n_points = 478 if refine_landmarks else 468
+        self._buffers = [np.full((n_points, 3), np.nan, np.float32) for _ in range(config.LANDMARK_BUFFERS)]
+        self._buf_idx = 0
+        self.points = None
+
+        # --- ROI mode: run inference on a crop around the last face only.
+        # --- Crops get their own static-image model: the video-mode model above tracks
+        # --- from its previous result, which must never be in another image's coordinates.
+        self.roi_mode = roi_mode
+        self.crop_mesh = None
+        if roi_mode:
+            self.crop_mesh = mp_face.FaceMesh(static_image_mode=True, max_num_faces=1,
+                                              refine_landmarks=refine_landmarks)
+        self.roi = None  # (x0, y0, x1, y1) in full-frame pixels, or None
+        self.roi_misses = 0
+        self.roi_cooldown = 0  # full-frame-only frames left after a miss
 
     def process_frame(self, frame):
         """Processes a single video frame to find face landmarks."""
-        
+
         # --- Convert BGR (OpenCV) to RGB (MediaPipe) for the model.
+        t0 = self.metrics.start()
         rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        self.metrics.stop("rgb_convert", t0)
+        return self.process_rgb(rgb_frame)
+
+    def process_rgb(self, rgb_frame):
+        """Runs landmark detection on a frame that is already RGB."""
+        if self.roi_mode:
+            return self._process_roi(rgb_frame)
+
+        # --- If a face is found, get the landmarks for the first face.
+        self.landmarks = self._detect(rgb_frame)
+        if self.landmarks is not None:
+            if self.as_array:
+                h, w = rgb_frame.shape[:2]
+                return self.to_array(self.landmarks, w, h)
+            return self.landmarks
+
+        # --- Return None if no face was detected.
+        self.points = None
+        return None
+
+    def _detect(self, rgb_frame, mesh=None):
+        """Runs FaceMesh on one image and returns the first face's landmarks (or None)."""
         # --- Performance optimization: pass the frame by reference.
         rgb_frame.flags.writeable = False
-        
+
         # --- Run the actual face landmark detection.
-        results = self.face_mesh.process(rgb_frame)
-        
+        t0 = self.metrics.start()
+        results = (mesh or self.face_mesh).process(rgb_frame)
+        self.metrics.stop("facemesh", t0)
+
         # --- Revert the optimization (good practice).
         rgb_frame.flags.writeable = True
 
-        # --- If a face is found, get the landmarks for the first face.
         if results.multi_face_landmarks:
-            self.landmarks = results.multi_face_landmarks[0].landmark
-            return self.landmarks
-        
-        # --- Return None if no face was detected.
-        self.landmarks = None
-        return None
\ No newline at end of file
+            return results.multi_face_landmarks[0].landmark
+        return None
+
+    def _process_roi(self, rgb_frame):
+        """ROI mode: infer on a crop around the last face, falling back to the full frame."""
+        h, w = rgb_frame.shape[:2]
+        landmarks = None
+
+        # --- 1. Try the crop around the previous face first.
+        if self.roi is not None and self.roi_cooldown == 0:
+            x0, y0, x1, y1 = self.roi
+            crop = np.ascontiguousarray(rgb_frame[y0:y1, x0:x1])
+            landmarks = self._detect(crop, self.crop_mesh)
+            if landmarks is not None:
+                # --- Scale within the crop, then shift back into the full frame.
+                pts = self.to_array(landmarks, x1 - x0, y1 - y0, x0, y0)
+            else:
+                # --- A miss costs one extra full-frame pass (below); the next frames stay
+                # --- on the full frame so a struggling crop doesn't double every frame.
+                self.roi_misses += 1
+                self.roi_cooldown = config.ROI_RETRY_FRAMES
+        elif self.roi_cooldown:
+            self.roi_cooldown -= 1
+
+        # --- 2. Face lost, first frame or after a miss: run on the whole frame.
+        if landmarks is None:
+            landmarks = self._detect(rgb_frame)
+            if landmarks is None:
+                self.roi = None
+                self.landmarks = None
+                self.points = None
+                return None
+            pts = self.to_array(landmarks, w, h)
+
+        # --- 3. Remember where the face is for the next frame.
+        self.roi = self._roi_from_points(pts, w, h)
+
+        if self.as_array:
+            self.landmarks = landmarks
+            return pts
+
+        # --- Legacy callers expect normalized full-frame MediaPipe landmarks
+        # --- (only the tracked ones are remapped, for the same reason as to_array).
+        for i, (x, y, z) in zip(self._idx_list, pts[self.indices].tolist()):
+            p = landmarks[i]
+            p.x, p.y, p.z = x / w, y / h, z / w
+        self.landmarks = landmarks
+        return landmarks
+
+    def _roi_from_points(self, pts, w, h):
+        """Builds the next crop box: the landmark bounds plus a margin, clipped to the frame."""
+        face = pts[utils.ROI_IDX]
+        x_min, y_min = face[:, 0].min(), face[:, 1].min()
+        x_max, y_max = face[:, 0].max(), face[:, 1].max()
+
+        # --- Pad by ROI_MARGIN of the face size on every side (and keep a minimum size).
+        size = max(x_max - x_min, y_max - y_min, config.ROI_MIN_SIZE)
+        pad = size * config.ROI_MARGIN
+        cx, cy = (x_min + x_max) / 2.0, (y_min + y_max) / 2.0
+        half = size / 2.0 + pad
+
+        x0 = max(0, int(cx - half))
+        y0 = max(0, int(cy - half))
+        x1 = min(w, int(cx + half))
+        y1 = min(h, int(cy + half))
+        if x1 - x0 < 2 or y1 - y0 < 2:
+            return None
+        return x0, y0, x1, y1
+
+    def to_array(self, landmarks, w, h, x0=0, y0=0):
+        """
+        Copies the tracked landmarks into the next preallocated (N, 3) pixel array.
+        w, h is the size of the image the landmarks were found in and (x0, y0) its
+        offset in the frame (a crop's, in ROI mode). MediaPipe's z is normalized by
+        that image's width, so z * w is in pixels for crops and full frames alike.
+        Rows outside self.indices are NaN; pass 'indices' to the constructor to read more.
+        """
+        pts = self._buffers[self._buf_idx]
+        self._buf_idx = (self._buf_idx + 1) % len(self._buffers)
+
+        # --- One pass over the tracked protobuf objects (a flat list converts fastest),
+        # --- then scale them all at once.
+        self._flat[:] = [v for p in map(landmarks.__getitem__, self._idx_list) for v in (p.x, p.y, p.z)]
+        self._rows *= (w, h, w)
+        if x0 or y0:
+            self._rows += (x0, y0, 0)
+        pts[self.indices] = self._rows
+        self.points = pts
+        return pts
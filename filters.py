@@ -0,0 +1,146 @@
+# filters.py
+"""
+Cursor smoothing filters. All of them take (x, y, t) and return the
+filtered (x, y) in O(1) with fixed state, so any one can replace the
+fixed-alpha utils.smooth_val EMA in the gesture loop.
+
+- EmaFilter:      the original fixed-alpha exponential smoothing.
+- OneEuroFilter:  adaptive low-pass; smooth when still, fast when moving.
+- KalmanFilter:   constant-velocity Kalman filter per axis.
+"""
+
+import math
+
+import config
+import utils
+
+class EmaFilter:
+    """Fixed-alpha exponential smoothing (same as utils.smooth_val)."""
+    __slots__ = ("alpha", "x", "y")
+
+    def __init__(self, alpha=None):
+        self.alpha = config.SMOOTHING if alpha is None else alpha
+        self.x = self.y = None
+
+    def __call__(self, x, y, t):
+        self.x = utils.smooth_val(self.x, x, self.alpha)
+        self.y = utils.smooth_val(self.y, y, self.alpha)
+        return self.x, self.y
+
+    def reset(self):
+        self.x = self.y = None
+
+class _OneEuroAxis:
+    """One Euro filter state for a single coordinate."""
+    __slots__ = ("x", "dx")
+
+    def __init__(self):
+        self.x = None
+        self.dx = 0.0
+
+def _alpha(cutoff, dt):
+    """Low-pass smoothing factor for a cutoff frequency (Hz) and step dt (s)."""
+    tau = 1.0 / (2.0 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+class OneEuroFilter:
+    """One Euro filter (Casiez et al.): cutoff rises with speed to cut lag."""
+    __slots__ = ("min_cutoff", "beta", "d_cutoff", "ax", "ay", "t")
+
+    def __init__(self, min_cutoff=None, beta=None, d_cutoff=None):
+        self.min_cutoff = config.ONE_EURO_MIN_CUTOFF if min_cutoff is None else min_cutoff
+        self.beta = config.ONE_EURO_BETA if beta is None else beta
+        self.d_cutoff = config.ONE_EURO_D_CUTOFF if d_cutoff is None else d_cutoff
+        self.ax = _OneEuroAxis()
+        self.ay = _OneEuroAxis()
+        self.t = None
+
+    def _step(self, s, value, dt):
+        """Filters one coordinate."""
+        # --- Smoothed speed of this coordinate.
+        dx = (value - s.x) / dt
+        s.dx += _alpha(self.d_cutoff, dt) * (dx - s.dx)
+        # --- Faster motion -> higher cutoff -> less smoothing (less lag).
+        cutoff = self.min_cutoff + self.beta * abs(s.dx)
+        s.x += _alpha(cutoff, dt) * (value - s.x)
+        return s.x
+
+    def __call__(self, x, y, t):
+        if self.t is None or t <= self.t:
+            # --- First sample (or a repeated timestamp): pass it through.
+            if self.ax.x is None:
+                self.ax.x, self.ay.x = float(x), float(y)
+            self.t = t
+            return self.ax.x, self.ay.x
+        dt = t - self.t
+        self.t = t
+        return self._step(self.ax, x, dt), self._step(self.ay, y, dt)
+
+    def reset(self):
+        self.ax = _OneEuroAxis()
+        self.ay = _OneEuroAxis()
+        self.t = None
+
+class _KalmanAxis:
+    """Position/velocity state and 2x2 covariance for one coordinate."""
+    __slots__ = ("p", "v", "p00", "p01", "p11")
+
+    def __init__(self, p):
+        self.p, self.v = float(p), 0.0
+        self.p00, self.p01, self.p11 = config.KALMAN_MEASUREMENT_NOISE, 0.0, 1e4
+
+class KalmanFilter:
+    """Constant-velocity Kalman filter per axis, written out in scalars (no matrices)."""
+    __slots__ = ("q", "r", "ax", "ay", "t")
+
+    def __init__(self, process_noise=None, measurement_noise=None):
+        self.q = config.KALMAN_PROCESS_NOISE if process_noise is None else process_noise
+        self.r = config.KALMAN_MEASUREMENT_NOISE if measurement_noise is None else measurement_noise
+        self.ax = self.ay = None
+        self.t = None
+
+    def _step(self, s, z, dt):
+        """Predict with constant velocity, then correct with measurement z."""
+        # --- Predict: x = F x,  P = F P F' + Q (white-noise acceleration model).
+        s.p += s.v * dt
+        q = self.q
+        p00 = s.p00 + dt * (2.0 * s.p01 + dt * s.p11) + q * dt ** 3 / 3.0
+        p01 = s.p01 + dt * s.p11 + q * dt ** 2 / 2.0
+        p11 = s.p11 + q * dt
+
+        # --- Update with the position measurement.
+        k0 = p00 / (p00 + self.r)
+        k1 = p01 / (p00 + self.r)
+        err = z - s.p
+        s.p += k0 * err
+        s.v += k1 * err
+        s.p00 = (1.0 - k0) * p00
+        s.p01 = (1.0 - k0) * p01
+        s.p11 = p11 - k1 * p01
+        return s.p
+
+    def __call__(self, x, y, t):
+        if self.ax is None:
+            self.ax, self.ay = _KalmanAxis(x), _KalmanAxis(y)
+            self.t = t
+            return self.ax.p, self.ay.p
+        dt = t - self.t
+        if dt <= 0:
+            return self.ax.p, self.ay.p
+        self.t = t
+        return self._step(self.ax, x, dt), self._step(self.ay, y, dt)
+
+    def reset(self):
+        self.ax = self.ay = None
+        self.t = None
+
+FILTERS = {
+    "ema": EmaFilter,
+    "one_euro": OneEuroFilter,
+    "kalman": KalmanFilter,
+}
+
+def create_filter(name=None):
+    """Builds the cursor filter selected by config.CURSOR_FILTER."""
+    name = config.CURSOR_FILTER if name is None else name
+    return FILTERS[name]()
@@ -2,6 +2,7 @@
 import cv2, mediapipe as mp, pyautogui, numpy as np, time, threading, webbrowser, os, psutil
 import speech_recognition as sr, pyttsx3
 from datetime import datetime
+from camera import CameraStream
 
 # ===== Settings =====
 SMOOTHING = 0.2
@@ -15,7 +16,7 @@ TRIPLE_BLINK_WINDOW = 2.0            # seconds window to detect 3 blink events
 screen_w, screen_h = pyautogui.size()
 mp_face = mp.solutions.face_mesh
 face_mesh = mp_face.FaceMesh(refine_landmarks=True)
-cap = cv2.VideoCapture(CAM_INDEX)
+cap = CameraStream(CAM_INDEX).start()   # frames grabbed on a background thread
 
 nose_idx = [1, 2, 4]
 left_eye = [33,160,158,133,153,144]
@@ -274,6 +275,9 @@ cv2.moveWindow("Head + Voice Mouse", win_x, win_y)
 while True:
     ok, frame = cap.read()
     if not ok:
+        # A timeout is just a late frame; only a stopped stream ends the loop.
+        if cap.running:
+            continue
         print("Camera read failed.")
         break
 
@@ -0,0 +1,253 @@
+# gestures.py
+"""
+Turns per-frame face landmarks into mouse actions: blink clicks,
+the triple-blink voice toggle, wink actions (right-click, drag, scroll
+mode), dwell clicks and calibrated cursor movement driven by the nose
+point or, in head_pose mode, by head yaw/pitch.
+"""
+
+import math
+import queue
+import time
+
+import numpy as np
+
+import config
+import utils
+from blink_detector import BlinkDetector, BlinkEvent, WinkDetector
+from dwell import DwellClicker
+from filters import create_filter
+from metrics import Metrics
+
+class GestureController:
+    """Holds the blink and cursor state that persists between frames."""
+
+    def __init__(self, calib, mouse, on_triple_blink=None, metrics=None, latency=None, cursor=None,
+                 head_pose=None):
+        """Stores the calibration, the mouse backend and the triple-blink callback."""
+        self.calib = calib
+        self.mouse = mouse
+        self.cursor = cursor    # --- Optional CursorThread that owns cursor movement.
+        self.on_triple_blink = on_triple_blink
+        self.metrics = metrics or Metrics(enabled=False)
+        self.latency = latency  # --- Optional LatencyRecorder (motion-to-photon mode).
+        self.head_pose = head_pose  # --- Optional HeadPoseEstimator: cursor follows yaw/pitch.
+
+        # --- Per-frame state carried over from the old main loop.
+        self.smooth_pos = [None, None]
+        self.filter = create_filter()  # --- Cursor smoothing (config.CURSOR_FILTER).
+        self.blink = BlinkDetector()  # --- Time-based blink events with hysteresis.
+        self.clicks_enabled = True  # --- Off while the blink threshold is being calibrated.
+
+        # --- Per-eye winks and the modes they toggle.
+        self.winks = WinkDetector() if config.WINKS_ENABLED else None
+        self.dragging = False
+        self.scroll_mode = False
+        self.scroll_anchor = None  # --- Screen y where scroll mode started.
+        self.scroll_t = 0.0
+        self.scroll_acc = 0.0      # --- Scroll amount not yet sent (less than one step).
+
+        # --- Dwell clicking (toggled with 'd' in main).
+        self.dwell = DwellClicker()
+        self.dwell_enabled = config.DWELL_ENABLED
+
+        # --- Changes asked for by other threads (main's keys), applied on the gesture thread.
+        self._requests = queue.Queue()
+
+    def process(self, landmarks, w, h, t=None, t_capture=None):
+        """
+        Runs blink and cursor logic for one frame and returns overlay info.
+        'landmarks' is either MediaPipe landmarks or FaceTracker's pixel array;
+        't' is the frame time in seconds (defaults to the wall clock) and
+        't_capture' the perf_counter() capture time used for latency samples.
+        """
+        return self.apply(self.features(landmarks, w, h), t, t_capture)
+
+    def features(self, landmarks, w, h):
+        """Reduces one frame's landmarks to what the gestures use: nose, eye ratios, control point."""
+        if isinstance(landmarks, np.ndarray):
+            # --- Fast path: one fancy-indexed lookup per feature.
+            nose = utils.avg_pt_arr(landmarks, utils.NOSE_IDX)
+            r_left, r_right = utils.blink_ratios_arr(landmarks)
+        else:
+            # --- Get the stable nose position for tracking.
+            nose = utils.avg_pt(landmarks, config.nose_idx, w, h)
+
+            # --- Calculate the blink ratio for each eye.
+            r_left = utils.blink_ratio(landmarks, config.left_eye, w, h)
+            r_right = utils.blink_ratio(landmarks, config.right_eye, w, h)
+
+        # --- The point the calibration maps to the screen: nose pixels or (yaw, pitch).
+        control = nose
+        if self.head_pose:
+            t0 = self.metrics.start()
+            control = self.head_pose.estimate(landmarks, w, h)
+            self.metrics.stop("head_pose", t0)
+        return {'nose': nose, 'r_left': r_left, 'r_right': r_right, 'control': control}
+
+    def apply(self, feats, t=None, t_capture=None):
+        """Runs blink and cursor logic on features() output (inferred or extrapolated)."""
+        nose, r_left, r_right, control = feats['nose'], feats['r_left'], feats['r_right'], feats['control']
+        now_t = time.time() if t is None else t
+        blink_r = utils.detector_ratio(r_left, r_right, winks=self.winks is not None)
+        if self.winks:
+            wink = self.winks.update(r_left, r_right, now_t, self.calib.blink_thresh, self.calib.blink_open_thresh)
+            if wink and self.clicks_enabled:
+                self._on_wink(wink)
+
+        event = self.blink.update(blink_r, now_t, self.calib.blink_thresh, self.calib.blink_open_thresh)
+        blinking = self.blink.closed
+        if event and self.clicks_enabled:
+            self._on_blink(event)
+
+        self._move_cursor(control, now_t, t_capture)
+
+        mode = "drag" if self.dragging else "scroll" if self.scroll_mode else None
+        return {'nose': nose, 'control': control, 'blink': blinking, 'blink_ratio': float(blink_r), 'mode': mode,
+                'dwell': self.dwell.progress if self.dwell_enabled else 0.0}
+
+    def post(self, action, value=None):
+        """Queues a state change ("reset_cursor", "dwell" or "clicks") for the gesture thread."""
+        self._requests.put((action, value))
+
+    def apply_requests(self):
+        """Applies posted changes; call from the thread that runs process()."""
+        while True:
+            try:
+                action, value = self._requests.get_nowait()
+            except queue.Empty:
+                return
+            if action == "reset_cursor":
+                self.reset_cursor()
+            elif action == "dwell":
+                self.dwell.reset()
+                self.dwell_enabled = value
+            elif action == "clicks":
+                self.clicks_enabled = value
+
+    def reset_cursor(self):
+        """Forgets cursor history (filter, dwell, head pose) after face loss or recalibration."""
+        self.filter.reset()
+        self.smooth_pos = [None, None]
+        self.dwell.reset()
+        if self.head_pose:
+            self.head_pose.reset()
+
+    def _on_blink(self, event):
+        """Turns a blink event into clicks / the triple-blink toggle."""
+        if event is BlinkEvent.LONG:
+            # --- Optional extra action for a held blink (config.LONG_BLINK_ACTION).
+            if config.LONG_BLINK_ACTION == "double_click":
+                self.mouse.double_click()
+            elif config.LONG_BLINK_ACTION == "right_click":
+                self.mouse.click("right")
+            return
+
+        # --- A blink while dragging drops what is being dragged.
+        if self.dragging:
+            self.set_dragging(False)
+            return
+
+        # --- 1. Every blink is a single mouse click.
+        self.mouse.click()
+
+        # --- 2. The third blink in the window hands off to the voice toggle.
+        if event is BlinkEvent.TRIPLE and self.on_triple_blink:
+            self.on_triple_blink()
+
+    def _on_wink(self, event):
+        """Runs the action config.WINK_ACTIONS assigns to a wink."""
+        action = config.WINK_ACTIONS.get(event.value, "none")
+        if action == "right_click":
+            self.mouse.click("right")
+        elif action == "double_click":
+            self.mouse.double_click()
+        elif action == "drag":
+            self.set_scroll_mode(False)
+            self.set_dragging(not self.dragging)
+        elif action == "scroll":
+            self.set_dragging(False)
+            self.set_scroll_mode(not self.scroll_mode)
+
+    def set_scroll_mode(self, on):
+        """Enters or leaves scroll mode (re-anchored on the next frame)."""
+        self.scroll_mode = on
+        self.scroll_anchor = None
+        self.scroll_acc = 0.0
+
+    def set_dragging(self, on):
+        """Presses or releases the left button for a drag."""
+        if on == self.dragging:
+            return
+        if on:
+            self.mouse.mouse_down()
+        else:
+            self.mouse.mouse_up()
+        self.dragging = on
+
+    def _scroll(self, y, now_t):
+        """Scroll mode: scrolls at a speed set by how far the head moved from the anchor."""
+        if self.scroll_anchor is None:
+            self.scroll_anchor, self.scroll_t = y, now_t
+            return
+        dt, self.scroll_t = now_t - self.scroll_t, now_t
+
+        # --- Looking up (smaller y) scrolls up; small offsets are ignored.
+        offset = self.scroll_anchor - y
+        if abs(offset) <= config.SCROLL_DEADZONE:
+            return
+        offset -= math.copysign(config.SCROLL_DEADZONE, offset)
+        self.scroll_acc += offset * config.SCROLL_SPEED * dt
+
+        # --- Send whole steps only; keep the remainder for the next frame.
+        steps = int(self.scroll_acc / config.SCROLL_STEP)
+        if steps:
+            self.scroll_acc -= steps * config.SCROLL_STEP
+            try:
+                self.mouse.scroll(steps * config.SCROLL_STEP)
+            except Exception:
+                pass # Ignore occasional errors
+
+    def _move_cursor(self, control, now_t, t_capture=None):
+        """Maps the control point to the screen and moves the smoothed cursor."""
+        # --- Only move the mouse once calibrated (and when the pose solved).
+        if not self.calib.calibrated or control is None:
+            return
+
+        # --- Map the control point to screen (x,y) using calibration data.
+        mapped = self.calib.map_to_screen(control[0], control[1])
+        if not mapped:
+            return
+
+        # --- Apply smoothing to the cursor position.
+        self.smooth_pos[0], self.smooth_pos[1] = self.filter(mapped[0], mapped[1], now_t)
+
+        # --- In scroll mode the head scrolls instead of moving the cursor.
+        if self.scroll_mode:
+            self._scroll(self.smooth_pos[1], now_t)
+            return
+
+        # --- Holding the cursor still clicks (or drops a drag).
+        x, y = self.smooth_pos
+        if self.dwell_enabled and self.dwell.update(x, y, now_t) and self.clicks_enabled:
+            if self.dragging:
+                self.set_dragging(False)
+            else:
+                self.mouse.click()
+
+        # --- With a cursor thread, just publish the target; it does the moving.
+        if self.cursor:
+            self.cursor.set_target(self.smooth_pos[0], self.smooth_pos[1], t_capture)
+            return
+
+        # --- Move the mouse (the backend skips moves of less than a pixel).
+        t0 = self.metrics.start()
+        try:
+            moved = self.mouse.move_to(self.smooth_pos[0], self.smooth_pos[1])
+        except Exception:
+            moved = False # Ignore occasional errors
+        self.metrics.stop("mouse_move", t0)
+
+        # --- The move has returned: this frame's motion has reached the cursor.
+        if moved and self.latency:
+            self.latency.record(t_capture)
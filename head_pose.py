@@ -0,0 +1,100 @@
+# head_pose.py
+"""
+Estimates head yaw/pitch from six FaceMesh landmarks with cv2.solvePnP,
+so the cursor can follow head rotation instead of the nose pixel
+(which mixes rotation with sideways body movement).
+
+The camera intrinsics are built once per frame size. Only the first
+frame (or the first after losing the face) gets a full solve; later
+frames are warm-started from the previous pose and refined with a
+capped number of Levenberg-Marquardt steps (solvePnPRefineLM). A plain
+solvePnP(useExtrinsicGuess=True) still iterates to its own convergence
+and measured no faster than a cold solve.
+"""
+
+import math
+
+import cv2
+import numpy as np
+
+import config
+import utils
+
+# --- Full solve for the first frame: SQPnP where available (OpenCV 4.5.3+).
+COLD_FLAGS = getattr(cv2, "SOLVEPNP_SQPNP", cv2.SOLVEPNP_ITERATIVE)
+
+# --- Generic 3D face model (mm) for config.pose_idx, in camera axes for an
+# --- unmirrored frame: x right, y down, z away from the camera, nose tip at 0.
+MODEL_POINTS = np.array([
+    [0.0, 0.0, 0.0],          # nose tip        (1)
+    [0.0, 330.0, 65.0],       # chin            (152)
+    [-225.0, -170.0, 135.0],  # right eye outer (33), image-left when unmirrored
+    [225.0, -170.0, 135.0],   # left eye outer  (263)
+    [-150.0, 150.0, 125.0],   # mouth right     (61)
+    [150.0, 150.0, 125.0],    # mouth left      (291)
+], dtype=np.float64)
+
+class HeadPoseEstimator:
+    """Solves the head pose per frame and returns (yaw, pitch) in degrees."""
+
+    def __init__(self, mirrored=True):
+        """'mirrored' says whether frames were flipped (main.py and replay.py flip them)."""
+        self.model = MODEL_POINTS.copy()
+        if mirrored:
+            # --- A flipped frame swaps which eye is on the image left.
+            self.model[:, 0] *= -1.0
+        self.size = None
+        self.camera = None
+        self.dist = np.zeros((4, 1))
+        self.rvec = None
+        self.tvec = None
+        self.image_pts = np.zeros((len(config.pose_idx), 2), dtype=np.float64)
+        self.criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_COUNT, config.HEAD_POSE_REFINE_ITERS, 1e-4)
+
+    def _intrinsics(self, w, h):
+        """Approximate pinhole camera (focal length ~ frame width), cached per frame size."""
+        if self.size != (w, h):
+            self.size = (w, h)
+            self.camera = np.array([
+                [float(w), 0.0, w / 2.0],
+                [0.0, float(w), h / 2.0],
+                [0.0, 0.0, 1.0],
+            ])
+            self.reset()
+        return self.camera
+
+    def reset(self):
+        """Drops the warm start (e.g. when the face is lost)."""
+        self.rvec = None
+        self.tvec = None
+
+    def estimate(self, landmarks, w, h):
+        """Returns (yaw, pitch) in degrees for pixel-array or MediaPipe landmarks, or None."""
+        pts = self.image_pts
+        if isinstance(landmarks, np.ndarray):
+            pts[:] = landmarks.take(utils.POSE_IDX, axis=0)[:, :2]
+        else:
+            for row, i in enumerate(config.pose_idx):
+                pts[row, 0] = landmarks[i].x * w
+                pts[row, 1] = landmarks[i].y * h
+
+        camera = self._intrinsics(w, h)
+        if self.rvec is None:
+            ok, rvec, tvec = cv2.solvePnP(self.model, pts, camera, self.dist, flags=COLD_FLAGS)
+        else:
+            # --- Start from last frame's pose; the head barely moves between frames.
+            rvec, tvec = cv2.solvePnPRefineLM(
+                self.model, pts, camera, self.dist, self.rvec, self.tvec, self.criteria
+            )
+            ok = True
+        if not ok or tvec[2, 0] <= 0:
+            self.reset()
+            return None
+        self.rvec, self.tvec = rvec, tvec
+
+        # --- The face looks along the model's -z axis; angles of that direction.
+        R, _ = cv2.Rodrigues(rvec)
+        fx, fy, fz = -R[0, 2], -R[1, 2], -R[2, 2]
+        yaw = math.degrees(math.atan2(fx, -fz))
+        pitch = math.degrees(math.atan2(fy, -fz))
+        return yaw, pitch
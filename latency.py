@@ -0,0 +1,80 @@
+# latency.py
+"""
+Motion-to-photon measurement: records the delay between a frame being
+captured and the matching cursor move returning, then reports the
+latency distribution. Works live (main.py) or on a recording with a
+fake mouse (replay.py --latency).
+"""
+
+import json
+import time
+
+import config
+from metrics import RollingHistogram
+
+class LatencyRecorder:
+    """Collects capture-to-cursor-move latencies in milliseconds."""
+
+    def __init__(self, max_samples=None, bin_ms=None):
+        self.max_samples = config.LATENCY_MAX_SAMPLES if max_samples is None else max_samples
+        self.bin_ms = config.LATENCY_BIN_MS if bin_ms is None else bin_ms
+        self.hist = RollingHistogram(self.max_samples)
+        self.total_ms = 0.0
+
+    def record(self, t_capture, t_done=None):
+        """Adds one sample; both times are time.perf_counter() values."""
+        if not t_capture:
+            return
+        t_done = time.perf_counter() if t_done is None else t_done
+        ms = (t_done - t_capture) * 1000.0
+        self.hist.add(ms)
+        self.total_ms += ms
+
+    def report(self):
+        """Returns count, mean, percentiles, max and a fixed-width histogram."""
+        h = self.hist
+        n = min(h.count, h.size)
+        if n == 0:
+            return {'count': 0}
+        pct = h.percentiles((50, 90, 95, 99))
+
+        # --- Bucket the samples currently held into bin_ms-wide bins.
+        bins = {}
+        for ms in h.samples[:n]:
+            b = int(ms // self.bin_ms) * self.bin_ms
+            bins[b] = bins.get(b, 0) + 1
+
+        return {
+            'count': h.count,
+            'mean_ms': round(self.total_ms / h.count, 3),
+            'p50_ms': round(pct[50], 3),
+            'p90_ms': round(pct[90], 3),
+            'p95_ms': round(pct[95], 3),
+            'p99_ms': round(pct[99], 3),
+            'max_ms': round(h.max, 3),
+            'histogram': [[b, bins[b]] for b in sorted(bins)],
+        }
+
+    def format_report(self):
+        """Returns the report as printable text with a small ASCII histogram."""
+        r = self.report()
+        if not r['count']:
+            return "Motion-to-photon: no samples recorded."
+        lines = [
+            f"Motion-to-photon latency over {r['count']} moves: "
+            f"mean {r['mean_ms']:.1f} ms, p50 {r['p50_ms']:.1f}, p90 {r['p90_ms']:.1f}, "
+            f"p95 {r['p95_ms']:.1f}, p99 {r['p99_ms']:.1f}, max {r['max_ms']:.1f}"
+        ]
+        peak = max(c for _, c in r['histogram'])
+        for b, c in r['histogram']:
+            bar = "#" * max(1, int(40 * c / peak))
+            lines.append(f"  {b:6.0f}-{b + self.bin_ms:<6.0f} ms {c:6d} {bar}")
+        return "\n".join(lines)
+
+    def save(self, path):
+        """Writes the report as JSON."""
+        try:
+            with open(path, "w") as f:
+                json.dump(self.report(), f, indent=2)
+        except OSError as e:
+            print(f"Latency report error: {e}")
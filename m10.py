@@ -1,20 +1,19 @@
 import cv2
-import mediapipe as mp
 import pyautogui
 import numpy as np
-import dlib
-import math
+import config
+import utils
+from calibration import Calibration
+from camera import CameraStream
+from face_tracking import FaceTracker
+from profiles import load_profile
 
-# Initialize mediapipe face mesh for eye tracking
-mp_face_mesh = mp.solutions.face_mesh
-face_mesh = mp_face_mesh.FaceMesh(refine_landmarks=True)
+# Eyelid points the grid navigation averages (tracked on top of the blink/eye points).
+eyelid_landmarks = [145, 159, 374, 386]
 
-# Initialize dlib for blink detection
-detector = dlib.get_frontal_face_detector()
-predictor = dlib.shape_predictor("shape_predictor_68_face_landmarks.dat")
-left_eye_landmarks = [36, 37, 38, 39, 40, 41]
-right_eye_landmarks = [42, 43, 44, 45, 46, 47]
-BLINK_RATIO_THRESHOLD = 5.7
+# One FaceMesh pass per frame serves both blink detection and eye tracking
+# (this used to also run dlib's face detector + 68-point predictor).
+tracker = FaceTracker(as_array=True, roi_mode=config.ROI_TRACKING, indices=eyelid_landmarks)
 
 # Screen and grid settings
 screen_w, screen_h = pyautogui.size()
@@ -24,43 +23,25 @@ grid_rows = 30
 key_width = screen_w // grid_cols
 key_height = (screen_h // 2) // grid_rows
 
-cam = cv2.VideoCapture(0)
+cam = CameraStream(config.CAM_INDEX).start()  # same camera the profile is looked up for
+
+# Blink threshold: the user's calibrated one from their profile ('b' in main.py),
+# else config.BLINK_THRESH. Both are tuned for utils' FaceMesh eye ratio (the old
+# 5.7 here was tuned for dlib's eye points and doesn't carry over).
+calib = Calibration()
+if config.PROFILE_ENABLED:
+    load_profile(calib, cam.frame_size())
 
 eye_movement_threshold = 0.03
 speed_multiplier = 0.04
 pyautogui.moveTo(screen_w // 2, keyboard_start_y + (screen_h // 4))
 
-# Blink detection helper functions from Test2.py
-def midpoint(point1, point2):
-    return (point1.x + point2.x) / 2, (point1.y + point2.y) / 2
-
-def euclidean_distance(point1, point2):
-    return math.sqrt((point1[0] - point2[0])**2 + (point1[1] - point2[1])**2)
-
-def get_blink_ratio(eye_points, facial_landmarks):
-    corner_left = (facial_landmarks.part(eye_points[0]).x, facial_landmarks.part(eye_points[0]).y)
-    corner_right = (facial_landmarks.part(eye_points[3]).x, facial_landmarks.part(eye_points[3]).y)
-    
-    center_top = midpoint(facial_landmarks.part(eye_points[1]), facial_landmarks.part(eye_points[2]))
-    center_bottom = midpoint(facial_landmarks.part(eye_points[5]), facial_landmarks.part(eye_points[4]))
-    
-    horizontal_length = euclidean_distance(corner_left, corner_right)
-    vertical_length = euclidean_distance(center_top, center_bottom)
-    
-    ratio = horizontal_length / vertical_length
-    return ratio
- 
 # Function to track eye movements and move the cursor
-def navigate_keyboard_by_grid(landmarks):
-    left_eye = [landmarks[145], landmarks[159]]
-    right_eye = [landmarks[374], landmarks[386]]
-    
-    avg_left_eye_y = (left_eye[0].y + left_eye[1].y) / 2
-    avg_right_eye_y = (right_eye[0].y + right_eye[1].y) / 2
-    avg_eye_y = (avg_left_eye_y + avg_right_eye_y) / 2
-    avg_left_eye_x = (left_eye[0].x + left_eye[1].x) / 2
-    avg_right_eye_x = (right_eye[0].x + right_eye[1].x) / 2
-    avg_eye_x = (avg_left_eye_x + avg_right_eye_x) / 2
+def navigate_keyboard_by_grid(pts, w, h):
+    # Mean of the four eyelid points, normalized to 0-1 like the old landmark .x/.y
+    eyes = pts.take(eyelid_landmarks, axis=0)
+    avg_eye_x = float(eyes[:, 0].mean()) / w
+    avg_eye_y = float(eyes[:, 1].mean()) / h
 
     eye_y_shift = avg_eye_y - 0.5
     eye_x_shift = avg_eye_x - 0.5
@@ -81,31 +62,25 @@ def navigate_keyboard_by_grid(landmarks):
 while True:
     ret, frame = cam.read()
     if not ret:
+        # A timeout is just a late frame; only a stopped stream ends the loop.
+        if cam.running:
+            continue
         print("Failed to open camera")
         break
     frame = cv2.flip(frame, 1)
-    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-
-    # Blink detection with Dlib
-    faces = detector(gray_frame)
-    for face in faces:
-        landmarks = predictor(gray_frame, face)
+    h, w = frame.shape[:2]
 
-        left_eye_ratio = get_blink_ratio(left_eye_landmarks, landmarks)
-        right_eye_ratio = get_blink_ratio(right_eye_landmarks, landmarks)
-        blink_ratio = (left_eye_ratio + right_eye_ratio) / 2
+    # Single landmark pass (FaceMesh) shared by blink detection and eye tracking
+    pts = tracker.process_frame(frame)
+    if pts is not None:
+        left_eye_ratio, right_eye_ratio = utils.blink_ratios_arr(pts)
+        blink_ratio = utils.detector_ratio(left_eye_ratio, right_eye_ratio)
 
-        if blink_ratio > BLINK_RATIO_THRESHOLD:
+        if blink_ratio > calib.blink_thresh:
             # Blink detected, trigger an action (e.g., click)
             pyautogui.click()
 
-    # Eye tracking with MediaPipe
-    output = face_mesh.process(rgb_frame)
-    landmark_points = output.multi_face_landmarks
-    if landmark_points:
-        landmarks = landmark_points[0].landmark
-        navigate_keyboard_by_grid(landmarks)
+        navigate_keyboard_by_grid(pts, w, h)
 
     cv2.imshow('Eye Controlled Keyboard with Blink Detection', frame)
 
@@ -5,7 +5,6 @@ main OpenCV loop to process gestures and user input.
 """
 
 import cv2
-import pyautogui
 import time
 import threading
 import os
@@ -13,41 +12,81 @@ import os
 # --- Import all our custom Python modules ---
 import config
 import utils
+from camera import CameraStream
+from cursor_thread import CursorThread
 from face_tracking import FaceTracker
+from blink_calibration import BlinkThresholdEstimator, apply_result
 from calibration import Calibration
+from gestures import GestureController
+from head_pose import HeadPoseEstimator
+from latency import LatencyRecorder
+from metrics import Metrics
+from mouse_output import create_mouse
+from pipeline import Pipeline
+from profiles import load_profile, save_profile
+from scheduler import FeatureExtrapolator, FrameScheduler
 from voice_assistant import VoiceController
 
 def main():
     """The main function that runs the entire application."""
-    
+
     # ===== 1. Initialization =====
-    
+
     # --- Create the shared dictionary and lock for thread communication.
     shared_state = {
         'voice_active': False,
         'lock': threading.Lock()
     }
-    
+
     # --- Initialize instances of our controller classes.
-    tracker = FaceTracker()
+    metrics = Metrics()
+    tracker = FaceTracker(as_array=config.LANDMARK_ARRAYS, roi_mode=config.ROI_TRACKING, metrics=metrics)
     calib = Calibration()
     voice_control = VoiceController(shared_state)
-    
+
+    def toggle_voice():
+        """Flips voice mode on/off (called on a triple blink)."""
+        with shared_state['lock']:
+            shared_state['voice_active'] = not shared_state['voice_active']
+            active = shared_state['voice_active']
+
+        msg = "Voice mode activated." if active else "Voice mode deactivated."
+        voice_control.speak(msg)
+
+    latency = LatencyRecorder() if config.LATENCY_MODE else None
+    mouse = create_mouse()
+    cursor = CursorThread(mouse, latency=latency).start() if config.CURSOR_THREAD_ENABLED else None
+    head_pose = HeadPoseEstimator(mirrored=True) if config.CURSOR_MODE == "head_pose" else None
+    gestures = GestureController(
+        calib, mouse, on_triple_blink=toggle_voice, metrics=metrics, latency=latency, cursor=cursor,
+        head_pose=head_pose,
+    )
+
+    # --- Frame skipping: skipped frames reuse the last features, moved along with the head.
+    skip_frames = config.FRAME_SKIP_ENABLED
+    scheduler = FrameScheduler()
+    extrapolator = FeatureExtrapolator()
+
     # --- Start the voice assistant logic on a separate background thread.
     voice_control.start_listener_thread()
-    
-    # --- Initialize the OpenCV camera.
-    cap = cv2.VideoCapture(config.CAM_INDEX)
-    
+
+    # --- Initialize the OpenCV camera on its own capture thread.
+    cap = CameraStream(config.CAM_INDEX)
+
     # --- Check if the camera opened successfully.
     if not cap.isOpened():
         print(f"--- FATAL ERROR: Could not open camera {config.CAM_INDEX} ---")
         return
     else:
+        cap.start()
         print(f"Camera {config.CAM_INDEX} opened successfully.")
-        
+
+    # --- Reuse this user's saved calibration if it matches the camera.
+    resolution = cap.frame_size()
+    profile_loaded = config.PROFILE_ENABLED and load_profile(calib, resolution)
+
     # ===== 2. Setup Camera Window =====
-    
+
     # --- Create and pin the small camera preview window to the top-right.
     cv2.namedWindow("Head + Voice Mouse", cv2.WINDOW_NORMAL)
     cv2.resizeWindow("Head + Voice Mouse", config.CAM_WIN_W, config.CAM_WIN_H)
@@ -55,130 +94,236 @@ def main():
     win_y = 10
     cv2.moveWindow("Head + Voice Mouse", win_x, win_y)
 
-    # ===== 3. Main Loop State Variables =====
-    
-    # --- Initialize variables to track smoothing, blinks, and time.
-    smooth_pos = [None, None]
-    blink_frame_count = 0
-    last_blink_event_times = []
-
-    print("Press 'c' to calibrate. Press 'q' to quit.")
-    voice_control.speak("Assistant ready.")
+    # ===== 3. Frame Stages =====
+    # --- Each stage takes and returns a 'packet' dict describing one frame.
 
-    # ===== 4. Main Application Loop =====
-    while True:
-        # --- Read a new frame from the camera.
+    def read_camera():
+        """Capture stage: takes the newest frame from the capture thread."""
+        t0 = metrics.start()
         ok, frame = cap.read()
+        metrics.stop("capture_wait", t0)
         if not ok:
+            return None
+        return {
+            'frame': frame, 't': cap.last_timestamp, 't_read': time.perf_counter(),
+            'landmarks': None, 'nose': None, 'control': None, 'blink': False, 'blink_ratio': None, 'mode': None,
+            'dwell': 0.0,
+        }
+
+    def prepare_frame(packet):
+        """Convert stage: flips the frame and makes the RGB copy for MediaPipe."""
+        t0 = metrics.start()
+        frame = cv2.flip(packet['frame'], 1)
+        packet['frame'] = frame
+        # --- Skipped frames don't need the RGB copy at all.
+        packet['infer'] = scheduler.should_infer() if skip_frames else True
+        if packet['infer']:
+            packet['rgb'] = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        metrics.stop("convert", t0)
+        return packet
+
+    def find_landmarks(packet):
+        """Inference stage: runs FaceMesh (skipped frames pass straight through)."""
+        if not packet['infer']:
+            return packet
+
+        t0 = time.perf_counter()
+        landmarks = tracker.process_rgb(packet.pop('rgb'))
+        packet['landmarks'] = landmarks
+        if metrics.enabled:
+            metrics.record("inference", time.perf_counter() - t0)
+        if skip_frames:
+            scheduler.record_inference(time.perf_counter() - t0)
+        return packet
+
+    def handle_gestures(packet):
+        """Gesture stage: blink clicks, voice toggle and cursor movement."""
+        t0 = metrics.start()
+        gestures.apply_requests()  # --- Key presses from the render thread land here.
+        if packet['infer']:
+            feats = None
+            if packet['landmarks'] is not None:
+                h, w = packet['frame'].shape[:2]
+                feats = gestures.features(packet['landmarks'], w, h)
+            if skip_frames:
+                if feats is None:
+                    extrapolator.reset()
+                else:
+                    extrapolator.update(feats, packet['t'])
+        else:
+            # --- Skipped frame: extrapolate the features from the last inferred ones.
+            feats = extrapolator.predict(packet['t'])
+
+        if feats is not None:
+            packet.update(gestures.apply(feats, packet['t'], packet['t']))
+        else:
+            gestures.reset_cursor()  # --- Face lost: don't glide or warm-start from stale state.
+        metrics.stop("gesture", t0)
+        return packet
+
+    stages = [
+        ("convert", prepare_frame),
+        ("inference", find_landmarks),
+        ("gesture", handle_gestures),
+    ]
+
+    # --- Either overlap the stages on worker threads or run them in turn.
+    pipeline = None
+    if config.PIPELINE_ENABLED:
+        pipeline = Pipeline(read_camera, stages).start()
+        next_packet = pipeline.get
+    else:
+        def next_packet():
+            packet = read_camera()
+            for _, stage in stages:
+                if packet is None:
+                    break
+                packet = stage(packet)
+            return packet
+
+    # --- Blink threshold calibration state ('b' key).
+    blink_est = None
+    blink_calib_end = 0.0
+    # --- Gesture state belongs to the gesture stage's thread: the render loop only
+    # --- posts changes to it (gestures.post) and tracks the dwell toggle itself.
+    dwell_on = gestures.dwell_enabled
+
+    print("Press 'c' to calibrate, 'b' to calibrate blinks, 'd' to toggle dwell click, "
+          "'m' to toggle metrics, 'q' to quit.")
+    voice_control.speak("Calibration loaded. Assistant ready." if profile_loaded else "Assistant ready.")
+
+    # ===== 4. Main Application Loop (render stage) =====
+    while True:
+        # --- Get the next fully processed frame.
+        packet = next_packet()
+        if packet is None:
+            if not cap.running:
+                print("Camera stopped.")
+                break
             print("Camera read failed.")
             time.sleep(0.5)
             continue
 
-        # --- Flip the frame and get its dimensions.
-        frame = cv2.flip(frame, 1)
-        h, w = frame.shape[:2]
-
-        # --- Get all face landmarks from the frame.
-        landmarks = tracker.process_frame(frame)
-
-        # --- If a face was found, process gestures.
-        if landmarks:
-            # --- Get the stable nose position for tracking.
-            nose_x, nose_y = utils.avg_pt(landmarks, config.nose_idx, w, h)
-            cv2.circle(frame, (nose_x, nose_y), 5, (0, 255, 255), -1)
-
-            # --- Calculate the average blink ratio for both eyes.
-            r_left = utils.blink_ratio(landmarks, config.left_eye, w, h)
-            r_right = utils.blink_ratio(landmarks, config.right_eye, w, h)
-            blink_r = (r_left + r_right) / 2.0
-
-            # --- Check if the eye is "closed" (past the blink threshold).
-            if blink_r > config.BLINK_THRESH:
-                blink_frame_count += 1
-                cv2.putText(frame, "BLINK", (10, 40), 0, 1, (0, 0, 255), 2)
-
-                # --- If eye is held closed, trigger click and check for triple-blink.
-                if blink_frame_count >= config.BLINK_LIMIT:
-                    # --- 1. Perform a single mouse click.
-                    pyautogui.click()
-                    
-                    # --- 2. Check for triple-blink to toggle voice mode.
-                    now_t = time.time()
-                    last_blink_event_times.append(now_t)
-                    # --- Purge old blinks from the list.
-                    last_blink_event_times = [
-                        t for t in last_blink_event_times 
-                        if now_t - t <= config.TRIPLE_BLINK_WINDOW
-                    ]
-                    
-                    # --- If 3+ blinks occurred, toggle voice mode.
-                    if len(last_blink_event_times) >= 3:
-                        with shared_state['lock']:
-                            shared_state['voice_active'] = not shared_state['voice_active']
-                            active = shared_state['voice_active']
-                        
-                        msg = "Voice mode activated." if active else "Voice mode deactivated."
-                        voice_control.speak(msg)
-                        last_blink_event_times.clear() # Reset
-
-                    # --- Reset frame count to prevent rapid-fire clicks.
-                    blink_frame_count = 0 
+        frame = packet['frame']
+        landmarks = packet['landmarks']
+        t_render = metrics.start()
+
+        # --- Draw the tracked nose point and the blink indicator.
+        if packet['nose']:
+            cv2.circle(frame, packet['nose'], 5, (0, 255, 255), -1)
+        if packet['blink']:
+            cv2.putText(frame, "BLINK", (10, 40), 0, 1, (0, 0, 255), 2)
+        if packet['mode']:
+            cv2.putText(frame, packet['mode'].upper(), (130, 40), 0, 1, (255, 128, 0), 2)
+        # --- Dwell progress ring around the nose point.
+        if packet['dwell'] > 0 and packet['nose']:
+            cv2.ellipse(frame, packet['nose'], (18, 18), -90, 0, 360 * packet['dwell'], (0, 255, 0), 3)
+
+        # --- Blink calibration: feed this frame's ratio and finish when time is up.
+        if blink_est is not None:
+            blink_est.add(packet['blink_ratio'])
+            remaining = blink_calib_end - time.perf_counter()
+            if remaining > 0:
+                cv2.putText(frame, f"Blink a few times... {remaining:.0f}s", (10, 70), 0, 0.6, (0, 255, 255), 2)
             else:
-                # --- If eye is open, reset the blink counter.
-                blink_frame_count = 0
-
-            # --- If calibrated, move the mouse cursor.
-            if calib.calibrated:
-                # --- Map nose (x,y) to screen (x,y) using calibration data.
-                mapped = calib.map_to_screen(nose_x, nose_y)
-                if mapped:
-                    # --- Apply smoothing to the cursor position.
-                    smooth_pos[0] = utils.smooth_val(smooth_pos[0], mapped[0], config.SMOOTHING)
-                    smooth_pos[1] = utils.smooth_val(smooth_pos[1], mapped[1], config.SMOOTHING)
-                    
-                    # --- Move the mouse.
-                    try:
-                        pyautogui.moveTo(int(smooth_pos[0]), int(smooth_pos[1]), duration=0.0)
-                    except Exception:
-                        pass # Ignore occasional errors
+                result = blink_est.fit()
+                if result is None:
+                    print(f"Blink calibration failed: {blink_est.reason}.")
+                    voice_control.speak("Blink calibration failed. Press b to try again.")
+                else:
+                    apply_result(calib, result)
+                    print(f"Blink threshold: close > {result['close']:.2f}, open < {result['open']:.2f}")
+                    voice_control.speak("Blink calibration complete.")
+                    if calib.calibrated and config.PROFILE_ENABLED:
+                        save_profile(calib, resolution)
+                blink_est = None
+                gestures.post("clicks", True)
 
         # --- Draw calibration helper text on the frame.
         overlay_text = calib.get_overlay_text()
         if overlay_text:
             cv2.putText(frame, overlay_text, (10, 20), 0, 0.6, (0, 255, 255), 2)
-            
+
+        # --- Draw the live FPS / latency overlay.
+        if metrics.enabled and config.METRICS_OVERLAY:
+            for i, line in enumerate(metrics.overlay_lines()):
+                y = frame.shape[0] - 10 - 25 * i
+                cv2.putText(frame, line, (10, y), 0, 0.6, (0, 255, 0), 2)
+
         # --- Resize and display the final camera preview.
         preview = cv2.resize(frame, (config.CAM_WIN_W, config.CAM_WIN_H))
         cv2.imshow("Head + Voice Mouse", preview)
         # --- Keep the window pinned to the top-right.
         cv2.moveWindow("Head + Voice Mouse", win_x, win_y)
 
-        # --- Handle keyboard inputs (q, c, 1-5).
+        # --- Handle keyboard inputs (q, c, b, d, m, 1-5).
         key = cv2.waitKey(1) & 0xFF
+        metrics.stop("render", t_render)
+        metrics.frame_done(packet['t'])
 
         if key == ord('q'):
             break # Quit the main loop
+        if key == ord('m'):
+            metrics.enabled = not metrics.enabled
+            print(f"Metrics {'enabled' if metrics.enabled else 'disabled'}.")
+        if key == ord('d'):
+            dwell_on = not dwell_on
+            gestures.post("dwell", dwell_on)
+            voice_control.speak("Dwell click on." if dwell_on else "Dwell click off.")
         if key == ord('c'):
             msg = calib.start() # Start calibration
+            gestures.post("reset_cursor")
             voice_control.speak(msg)
+        if key == ord('b') and blink_est is None:
+            # --- Collect ratios for a few seconds; blinks don't click meanwhile.
+            blink_est = BlinkThresholdEstimator()
+            blink_calib_end = time.perf_counter() + config.BLINK_CALIB_SECONDS
+            gestures.post("clicks", False)
+            voice_control.speak("Look at the screen and blink a few times.")
 
         # --- Process calibration key presses (1-5).
         if 0 <= calib.stage < 5 and key == ord(str(calib.stage + 1)):
-            if landmarks:
-                point = utils.avg_pt(landmarks, config.nose_idx, w, h)
-                msg = calib.add_point(point)
+            if packet['control'] is not None:
+                msg = calib.add_point(packet['control'])
                 if msg:
                     voice_control.speak(msg)
+                # --- Calibration just finished: start the cursor fresh on the new mapping
+                # --- and remember it for next time.
+                if calib.calibrated:
+                    gestures.post("reset_cursor")
+                    if config.PROFILE_ENABLED:
+                        save_profile(calib, resolution)
             else:
                 print("Cannot calibrate: No face detected.")
                 voice_control.speak("I can't see your face.")
 
+        # --- In sequential mode the whole frame (not just FaceMesh) shares the budget.
+        if skip_frames and not pipeline:
+            scheduler.record_frame(time.perf_counter() - packet['t_read'], packet['infer'])
+
     # ===== 5. Cleanup =====
-    # --- Release the camera and close all windows when the loop exits.
+    # --- Stop the worker threads, release the camera and close all windows.
+    if cursor:
+        cursor.stop()
+    if pipeline:
+        pipeline.stop()
+        print(f"Pipeline stats: {pipeline.get_stats()}")
+    if gestures.dragging:
+        gestures.set_dragging(False)  # --- Never leave the button held down.
+    if voice_control.audio:
+        voice_control.audio.stop()
+        print(f"Voice segments: {voice_control.audio.get_stats()}")
+    if metrics.enabled:
+        metrics.dump()
+        print(f"Stage latency (ms): {metrics.summary()}")
+    if latency:
+        print(latency.format_report())
+        latency.save(config.LATENCY_REPORT_PATH)
     cap.release()
     cv2.destroyAllWindows()
-    print("Exiting.")
+    print(f"Exiting. Camera stats: {cap.get_stats()}")
+    print(f"Mouse moves: {mouse.moves} sent, {mouse.coalesced} coalesced.")
 
 if __name__ == "__main__":
     # --- Run the main() function when the script is executed.
-    main()
\ No newline at end of file
+    main()
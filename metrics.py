@@ -0,0 +1,141 @@
+# metrics.py
+"""
+Lightweight per-stage latency instrumentation: rolling histograms with
+p50/p95/p99, frame-rate and end-to-end latency tracking, text for the
+preview overlay, and a periodic dump to a JSON or CSV file.
+
+Timers are written as  t0 = metrics.start() ... metrics.stop("stage", t0)
+so that, when disabled, each call is a single attribute check.
+"""
+
+import json
+import os
+import time
+
+import config
+
+class RollingHistogram:
+    """Keeps the last N samples in a fixed-size ring and reports percentiles."""
+
+    def __init__(self, size):
+        self.samples = [0.0] * size
+        self.size = size
+        self.idx = 0
+        self.count = 0   # --- Total samples ever recorded.
+        self.max = 0.0
+
+    def add(self, value):
+        """Stores one sample, overwriting the oldest when full."""
+        self.samples[self.idx] = value
+        self.idx = (self.idx + 1) % self.size
+        self.count += 1
+        if value > self.max:
+            self.max = value
+
+    def percentiles(self, ps=(50, 95, 99)):
+        """Returns {p: value} over the samples currently in the window."""
+        n = min(self.count, self.size)
+        if n == 0:
+            return {p: 0.0 for p in ps}
+        ordered = sorted(self.samples[:n])
+        return {p: ordered[min(n - 1, int(p / 100.0 * n))] for p in ps}
+
+class Metrics:
+    """Collects stage timings, FPS and end-to-end latency for the main loop."""
+
+    def __init__(self, enabled=None, window=None, dump_path=None, dump_interval=None):
+        self.enabled = config.METRICS_ENABLED if enabled is None else enabled
+        self.window = config.METRICS_WINDOW if window is None else window
+        self.dump_path = config.METRICS_DUMP_PATH if dump_path is None else dump_path
+        self.dump_interval = config.METRICS_DUMP_INTERVAL if dump_interval is None else dump_interval
+        self.hists = {}
+        self._frame_times = RollingHistogram(self.window)
+        self._last_dump = time.perf_counter()
+
+    # ===== Hot-path timers =====
+
+    def start(self):
+        """Returns a start time, or 0.0 when metrics are disabled."""
+        if not self.enabled:
+            return 0.0
+        return time.perf_counter()
+
+    def stop(self, name, t0):
+        """Records the time since t0 under 'name' (no-op when disabled)."""
+        # --- t0 is 0.0 if the timer started while disabled ('m' pressed mid-stage).
+        if not self.enabled or not t0:
+            return
+        self.record(name, time.perf_counter() - t0)
+
+    def record(self, name, seconds):
+        """Adds an already-measured duration (in seconds) to a stage."""
+        hist = self.hists.get(name)
+        if hist is None:
+            hist = self.hists.setdefault(name, RollingHistogram(self.window))
+        hist.add(seconds * 1000.0)
+
+    def frame_done(self, t_capture):
+        """Marks a frame as shown; records FPS and capture-to-display latency."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self._frame_times.add(now)
+        if t_capture:
+            self.record("end_to_end", now - t_capture)
+        if self.dump_path and now - self._last_dump >= self.dump_interval:
+            self._last_dump = now
+            self.dump()
+
+    # ===== Reporting =====
+
+    def fps(self):
+        """Returns the display frame rate over the rolling window."""
+        ft = self._frame_times
+        n = min(ft.count, ft.size)
+        if n < 2:
+            return 0.0
+        newest = ft.samples[(ft.idx - 1) % ft.size]
+        oldest = ft.samples[ft.idx % ft.size] if ft.count >= ft.size else ft.samples[0]
+        span = newest - oldest
+        return (n - 1) / span if span > 0 else 0.0
+
+    def summary(self):
+        """Returns {stage: {count, p50, p95, p99, max}} with times in ms."""
+        out = {}
+        for name, hist in list(self.hists.items()):
+            pct = hist.percentiles()
+            out[name] = {
+                'count': hist.count,
+                'p50': round(pct[50], 3),
+                'p95': round(pct[95], 3),
+                'p99': round(pct[99], 3),
+                'max': round(hist.max, 3),
+            }
+        return out
+
+    def overlay_lines(self):
+        """Returns short text lines for the preview window overlay."""
+        e2e = self.hists.get("end_to_end")
+        e2e_p50 = e2e.percentiles((50,))[50] if e2e else 0.0
+        return [f"FPS {self.fps():.1f}  E2E {e2e_p50:.0f} ms"]
+
+    def dump(self, path=None):
+        """Writes the current summary: JSON snapshot, or rows appended to a CSV."""
+        path = path or self.dump_path
+        if not path:
+            return
+        summary = self.summary()
+        try:
+            if path.endswith(".csv"):
+                new_file = not os.path.exists(path)
+                with open(path, "a") as f:
+                    if new_file:
+                        f.write("time,stage,count,p50_ms,p95_ms,p99_ms,max_ms\n")
+                    now = time.time()
+                    for name, s in summary.items():
+                        f.write(f"{now:.3f},{name},{s['count']},{s['p50']},{s['p95']},{s['p99']},{s['max']}\n")
+            else:
+                with open(path, "w") as f:
+                    json.dump({'time': time.time(), 'fps': round(self.fps(), 2), 'stages': summary}, f, indent=2)
+        except OSError as e:
+            print(f"Metrics dump error: {e}")
@@ -0,0 +1,234 @@
+# mouse_output.py
+"""
+Mouse output backends. Everything that moves or clicks the mouse from
+the gesture loop goes through one of these, so the loop is not tied to
+pyautogui's per-call pause and can be pointed at a fake sink for tests.
+
+Backends:
+- PyAutoGuiMouse: pyautogui, but without its per-call PAUSE sleep.
+- Win32Mouse:     direct user32 calls through ctypes (Windows).
+- XlibMouse:      XTest fake input through python-xlib (Linux/X11).
+- NullMouse / RecordingMouse: discard or record calls (headless/replay).
+"""
+
+import sys
+import threading
+
+import config
+
+class MouseBackend:
+    """Base class: coalesces redundant moves and defines the shared interface."""
+
+    name = "base"
+
+    def __init__(self):
+        self.last_pos = None
+        self.moves = 0
+        self.coalesced = 0
+
+    def move_to(self, x, y):
+        """Moves the cursor unless it would land on the same pixel; returns True if moved."""
+        x, y = int(x), int(y)
+        if (x, y) == self.last_pos:
+            self.coalesced += 1
+            return False
+        self._move(x, y)
+        self.last_pos = (x, y)
+        self.moves += 1
+        return True
+
+    def double_click(self, button="left"):
+        """Two clicks in a row."""
+        self.click(button)
+        self.click(button)
+
+    # --- Backend-specific primitives.
+    def _move(self, x, y):
+        raise NotImplementedError
+
+    def click(self, button="left"):
+        raise NotImplementedError
+
+    def mouse_down(self, button="left"):
+        raise NotImplementedError
+
+    def mouse_up(self, button="left"):
+        raise NotImplementedError
+
+    def scroll(self, amount):
+        raise NotImplementedError
+
+class PyAutoGuiMouse(MouseBackend):
+    """pyautogui backend with the per-call PAUSE sleep skipped (failsafe kept)."""
+
+    name = "pyautogui"
+
+    def __init__(self):
+        super().__init__()
+        import pyautogui
+        self.pg = pyautogui
+
+    def _move(self, x, y):
+        self.pg.moveTo(x, y, duration=0.0, _pause=False)
+
+    def click(self, button="left"):
+        self.pg.click(button=button, _pause=False)
+
+    def double_click(self, button="left"):
+        self.pg.doubleClick(button=button, _pause=False)
+
+    def mouse_down(self, button="left"):
+        self.pg.mouseDown(button=button, _pause=False)
+
+    def mouse_up(self, button="left"):
+        self.pg.mouseUp(button=button, _pause=False)
+
+    def scroll(self, amount):
+        self.pg.scroll(amount, _pause=False)
+
+class Win32Mouse(MouseBackend):
+    """Calls user32 SetCursorPos / mouse_event directly."""
+
+    name = "win32"
+    # --- mouse_event flags: (down, up) per button.
+    BUTTON_FLAGS = {"left": (0x0002, 0x0004), "right": (0x0008, 0x0010), "middle": (0x0020, 0x0040)}
+    WHEEL = 0x0800
+
+    def __init__(self):
+        super().__init__()
+        import ctypes
+        self.user32 = ctypes.windll.user32
+
+    def _move(self, x, y):
+        self.user32.SetCursorPos(x, y)
+
+    def mouse_down(self, button="left"):
+        self.user32.mouse_event(self.BUTTON_FLAGS[button][0], 0, 0, 0, 0)
+
+    def mouse_up(self, button="left"):
+        self.user32.mouse_event(self.BUTTON_FLAGS[button][1], 0, 0, 0, 0)
+
+    def click(self, button="left"):
+        self.mouse_down(button)
+        self.mouse_up(button)
+
+    def scroll(self, amount):
+        # --- Same units as pyautogui.scroll on Windows (raw wheel delta).
+        self.user32.mouse_event(self.WHEEL, 0, 0, int(amount), 0)
+
+class XlibMouse(MouseBackend):
+    """Sends XTest fake input events through python-xlib."""
+
+    name = "xlib"
+    BUTTONS = {"left": 1, "middle": 2, "right": 3}
+
+    def __init__(self):
+        super().__init__()
+        from Xlib import X, display
+        from Xlib.ext import xtest
+        self.X = X
+        self.xtest = xtest
+        self.display = display.Display()
+        # --- One Display connection is shared by the cursor and gesture threads.
+        self.lock = threading.Lock()
+
+    def _move(self, x, y):
+        with self.lock:
+            self.xtest.fake_input(self.display, self.X.MotionNotify, x=x, y=y)
+            self.display.sync()
+
+    def mouse_down(self, button="left"):
+        with self.lock:
+            self.xtest.fake_input(self.display, self.X.ButtonPress, self.BUTTONS[button])
+            self.display.sync()
+
+    def mouse_up(self, button="left"):
+        with self.lock:
+            self.xtest.fake_input(self.display, self.X.ButtonRelease, self.BUTTONS[button])
+            self.display.sync()
+
+    def click(self, button="left"):
+        self.mouse_down(button)
+        self.mouse_up(button)
+
+    def scroll(self, amount):
+        # --- X11 scrolls in wheel clicks: button 4 is up, 5 is down.
+        button = 4 if amount > 0 else 5
+        with self.lock:
+            for _ in range(max(1, abs(int(amount)) // config.XLIB_SCROLL_UNIT)):
+                self.xtest.fake_input(self.display, self.X.ButtonPress, button)
+                self.xtest.fake_input(self.display, self.X.ButtonRelease, button)
+            self.display.sync()
+
+class NullMouse(MouseBackend):
+    """Discards everything (but still counts moves and coalescing)."""
+
+    name = "null"
+
+    def _move(self, x, y):
+        pass
+
+    def click(self, button="left"):
+        pass
+
+    def mouse_down(self, button="left"):
+        pass
+
+    def mouse_up(self, button="left"):
+        pass
+
+    def scroll(self, amount):
+        pass
+
+class RecordingMouse(MouseBackend):
+    """Records every call with the current frame time (for replay and tests)."""
+
+    name = "recording"
+
+    def __init__(self):
+        super().__init__()
+        self.events = []
+        self.t = 0.0  # --- Frame time, set by the caller.
+
+    def _move(self, x, y):
+        self.events.append({'t': self.t, 'type': 'move', 'x': x, 'y': y})
+
+    def click(self, button="left"):
+        self.events.append({'t': self.t, 'type': 'click', 'button': button})
+
+    def mouse_down(self, button="left"):
+        self.events.append({'t': self.t, 'type': 'mouse_down', 'button': button})
+
+    def mouse_up(self, button="left"):
+        self.events.append({'t': self.t, 'type': 'mouse_up', 'button': button})
+
+    def scroll(self, amount):
+        self.events.append({'t': self.t, 'type': 'scroll', 'amount': int(amount)})
+
+BACKENDS = {
+    "pyautogui": PyAutoGuiMouse,
+    "win32": Win32Mouse,
+    "xlib": XlibMouse,
+    "null": NullMouse,
+    "recording": RecordingMouse,
+}
+
+def create_mouse(name=None):
+    """Builds the configured backend; 'auto' picks the direct one for this OS."""
+    name = config.MOUSE_BACKEND if name is None else name
+    if name == "auto":
+        if sys.platform.startswith("win"):
+            name = "win32"
+        elif sys.platform.startswith("linux"):
+            name = "xlib"
+        else:
+            name = "pyautogui"
+
+    try:
+        mouse = BACKENDS[name]()
+    except Exception as e:
+        # --- Missing library or no display: fall back to pyautogui.
+        print(f"Mouse backend '{name}' unavailable ({e}); using pyautogui.")
+        mouse = PyAutoGuiMouse()
+    print(f"Mouse backend: {mouse.name}")
+    return mouse
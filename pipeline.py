@@ -0,0 +1,140 @@
+# pipeline.py
+"""
+A small staged pipeline: each stage runs on its own thread and hands
+work to the next stage through a bounded queue, so capture, inference
+and gesture handling overlap instead of running back to back.
+"""
+
+import queue
+import threading
+import time
+
+import config
+
+class StageStats:
+    """Running latency and queue-depth counters for one stage."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.last_time = 0.0
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.dropped = 0
+
+    def record(self, elapsed, depth):
+        """Adds one processed item to the stats."""
+        self.count += 1
+        self.total_time += elapsed
+        self.last_time = elapsed
+        if elapsed > self.max_time:
+            self.max_time = elapsed
+        self.queue_depth = depth
+        if depth > self.max_queue_depth:
+            self.max_queue_depth = depth
+
+    def summary(self):
+        """Returns the stats as a plain dictionary (times in ms)."""
+        avg = self.total_time / self.count if self.count else 0.0
+        return {
+            'count': self.count,
+            'avg_ms': round(avg * 1000.0, 3),
+            'last_ms': round(self.last_time * 1000.0, 3),
+            'max_ms': round(self.max_time * 1000.0, 3),
+            'queue_depth': self.queue_depth,
+            'max_queue_depth': self.max_queue_depth,
+            'dropped': self.dropped,
+        }
+
+class Pipeline:
+    """Runs a source function and a chain of stage functions on worker threads."""
+
+    def __init__(self, source, stages, maxsize=None):
+        """
+        source: callable returning the next item (or None to skip a beat).
+        stages: list of (name, fn) pairs; fn(item) returns the item for the
+                next stage, or None to drop it.
+        """
+        maxsize = config.PIPELINE_QUEUE_SIZE if maxsize is None else maxsize
+        self.source = source
+        self.names = ["capture"] + [name for name, _ in stages]
+        self.funcs = [source] + [fn for _, fn in stages]
+        # --- queues[i] is the output of step i (and the input of step i+1).
+        self.queues = [queue.Queue(maxsize=maxsize) for _ in self.funcs]
+        self.stats = {name: StageStats() for name in self.names}
+        self.threads = []
+        self.running = False
+
+    def _put(self, q, item, stats):
+        """Puts an item on a bounded queue, dropping the oldest one when full."""
+        while True:
+            try:
+                q.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    q.get_nowait()
+                    stats.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def _run_source(self):
+        """Worker loop for the first (capture) step."""
+        stats = self.stats[self.names[0]]
+        while self.running:
+            t0 = time.perf_counter()
+            item = self.source()
+            stats.record(time.perf_counter() - t0, self.queues[0].qsize())
+            if item is not None:
+                self._put(self.queues[0], item, stats)
+
+    def _run_stage(self, i):
+        """Worker loop for stage i: take from queue i-1, process, put to queue i."""
+        name, fn = self.names[i], self.funcs[i]
+        in_q, out_q = self.queues[i - 1], self.queues[i]
+        stats = self.stats[name]
+        while self.running:
+            try:
+                item = in_q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            t0 = time.perf_counter()
+            try:
+                item = fn(item)
+            except Exception as e:
+                print(f"Pipeline stage '{name}' error: {e}")
+                item = None
+            stats.record(time.perf_counter() - t0, in_q.qsize())
+
+            if item is not None:
+                self._put(out_q, item, stats)
+
+    def start(self):
+        """Starts one daemon thread per step and returns self."""
+        self.running = True
+        self.threads = [threading.Thread(target=self._run_source, daemon=True)]
+        for i in range(1, len(self.funcs)):
+            self.threads.append(threading.Thread(target=self._run_stage, args=(i,), daemon=True))
+        for t in self.threads:
+            t.start()
+        return self
+
+    def get(self, timeout=None):
+        """Returns the next fully processed item, or None on timeout."""
+        timeout = config.CAM_READ_TIMEOUT if timeout is None else timeout
+        try:
+            return self.queues[-1].get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def get_stats(self):
+        """Returns per-stage latency and queue-depth stats."""
+        return {name: self.stats[name].summary() for name in self.names}
+
+    def stop(self):
+        """Signals all worker threads to stop and waits briefly for them."""
+        self.running = False
+        for t in self.threads:
+            t.join(timeout=1.0)
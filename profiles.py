@@ -0,0 +1,70 @@
+# profiles.py
+"""
+Saves and loads calibration profiles (calibration points, fitted
+mapping, sensitivity and blink threshold) per user and camera, so a
+restart can skip the 5-point calibration. A profile is only applied
+when the camera still delivers the resolution it was recorded at.
+"""
+
+import getpass
+import json
+import os
+import re
+import time
+
+import config
+
+PROFILE_VERSION = 1
+
+def profile_path(user=None, cam=None):
+    """Returns the profile file for a user/camera pair, e.g. profiles/alice_cam0.json."""
+    user = user or config.PROFILE_USER or getpass.getuser()
+    cam = config.CAM_INDEX if cam is None else cam
+    # --- Keep the file name safe on every OS.
+    safe = re.sub(r"[^A-Za-z0-9_.-]", "_", f"{user}_cam{cam}")
+    return os.path.join(config.PROFILE_DIR, safe + ".json")
+
+def save_profile(calib, resolution, path=None):
+    """Writes the calibration to the profile file; returns True on success."""
+    path = profile_path() if path is None else path
+    data = {
+        'version': PROFILE_VERSION,
+        'saved_at': time.time(),
+        'resolution': list(resolution),
+        'calibration': calib.to_dict(),
+    }
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # --- Write to a temp file first so a crash never leaves half a profile.
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"Could not save profile {path}: {e}")
+        return False
+    print(f"Profile saved to {path}")
+    return True
+
+def load_profile(calib, resolution, path=None):
+    """Applies a saved profile to 'calib' if it matches this camera; returns True if loaded."""
+    path = profile_path() if path is None else path
+    if not os.path.exists(path):
+        return False
+    try:
+        with open(path) as f:
+            data = json.load(f)
+        if data.get('version') != PROFILE_VERSION:
+            print(f"Profile {path} has an unknown version; ignoring it.")
+            return False
+        if tuple(data['resolution']) != tuple(resolution):
+            print(f"Profile {path} was recorded at {data['resolution']}, camera is {list(resolution)}; recalibrate.")
+            return False
+        ok = calib.load_dict(data['calibration'])
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f"Could not load profile {path}: {e}")
+        return False
+
+    if ok:
+        print(f"Profile loaded from {path}")
+    return ok
@@ -0,0 +1,188 @@
+# replay.py
+"""
+Offline replay harness: feeds a recorded video (or a folder of frames)
+through FaceTracker, the blink logic and Calibration.map_to_screen with
+a recording mouse instead of pyautogui, then reports throughput,
+per-stage latency and the emitted click/move events. Runs headless.
+With --latency it also reports capture-to-move (motion-to-photon) latency.
+
+Usage:
+    python replay.py clip.mp4 [--events events.json] [--no-flip] [--skip] [--latency]
+"""
+
+import argparse
+import json
+import os
+import time
+
+import cv2
+
+import config
+from calibration import Calibration
+from face_tracking import FaceTracker
+from gestures import GestureController
+from head_pose import HeadPoseEstimator
+from latency import LatencyRecorder
+from metrics import Metrics
+from mouse_output import RecordingMouse
+from scheduler import FeatureExtrapolator, FrameScheduler
+
+IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".bmp")
+
+def iter_frames(source):
+    """Yields (video timestamp, BGR frame) from a video file or a directory of images."""
+    if os.path.isdir(source):
+        # --- Directory of frames: assume they were captured at TARGET_FPS.
+        names = sorted(n for n in os.listdir(source) if n.lower().endswith(IMAGE_EXTS))
+        for i, name in enumerate(names):
+            frame = cv2.imread(os.path.join(source, name))
+            if frame is not None:
+                yield i / config.TARGET_FPS, frame
+        return
+
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        print(f"--- ERROR: Could not open {source} ---")
+        return
+    fps = cap.get(cv2.CAP_PROP_FPS) or config.TARGET_FPS
+    i = 0
+    while True:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        yield i / fps, frame
+        i += 1
+    cap.release()
+
+def auto_calibrate(calib, control, span):
+    """Calibrates around the first control point (nose or head pose) with a fixed +/- span box."""
+    x, y = control
+    calib.start()
+    for pt in [(x, y), (x - span, y - span), (x + span, y - span),
+               (x - span, y + span), (x + span, y + span)]:
+        calib.add_point(pt)
+
+def replay(source, flip=True, skip_frames=False, span=None, measure_latency=False):
+    """Runs the gesture pipeline over a recording and returns a report dict."""
+    head_pose = HeadPoseEstimator(mirrored=flip) if config.CURSOR_MODE == "head_pose" else None
+    if span is None:
+        span = config.REPLAY_POSE_SPAN if head_pose else config.REPLAY_CALIB_SPAN
+    metrics = Metrics(enabled=True, window=10000, dump_path="")
+    # --- Same landmark path and skipping rule as main.py, so the numbers describe the app.
+    tracker = FaceTracker(as_array=config.LANDMARK_ARRAYS, roi_mode=config.ROI_TRACKING, metrics=metrics)
+    skip_frames = skip_frames and config.FRAME_SKIP_ENABLED
+    calib = Calibration()
+    mouse = RecordingMouse()
+    latency = LatencyRecorder() if measure_latency else None
+    gestures = GestureController(
+        calib, mouse,
+        on_triple_blink=lambda: mouse.events.append({'t': mouse.t, 'type': 'voice_toggle'}),
+        metrics=metrics, latency=latency, head_pose=head_pose,
+    )
+    scheduler = FrameScheduler()
+    extrapolator = FeatureExtrapolator()
+
+    frames = faces = 0
+    start = time.perf_counter()
+
+    for t, frame in iter_frames(source):
+        # --- The moment the frame is decoded stands in for the camera capture time.
+        t_capture = time.perf_counter()
+        frames += 1
+        mouse.t = t
+        t_frame = metrics.start()
+
+        # --- Convert stage.
+        t0 = metrics.start()
+        if flip:
+            frame = cv2.flip(frame, 1)
+        infer = scheduler.should_infer() if skip_frames else True
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB) if infer else None
+        metrics.stop("convert", t0)
+
+        # --- Inference stage (skipped frames don't run it).
+        t0 = time.perf_counter()
+        landmarks = None
+        if infer:
+            landmarks = tracker.process_rgb(rgb)
+            if skip_frames:
+                scheduler.record_inference(time.perf_counter() - t0)
+        metrics.stop("inference", t0)
+
+        # --- Gesture stage (blinks + cursor through the recording mouse),
+        # --- on extrapolated features for skipped frames.
+        t0 = metrics.start()
+        if infer:
+            feats = None
+            if landmarks is not None:
+                h, w = frame.shape[:2]
+                feats = gestures.features(landmarks, w, h)
+            if skip_frames:
+                if feats is None:
+                    extrapolator.reset()
+                else:
+                    extrapolator.update(feats, t)
+        else:
+            feats = extrapolator.predict(t)
+
+        if feats is not None:
+            faces += 1
+            if not calib.calibrated:
+                control = gestures.apply(feats, t, t_capture)['control']
+                if control is not None:
+                    auto_calibrate(calib, control, span)
+            else:
+                gestures.apply(feats, t, t_capture)
+        else:
+            gestures.reset_cursor()
+        metrics.stop("gesture", t0)
+        metrics.stop("total", t_frame)
+
+    elapsed = time.perf_counter() - start
+    counts = {}
+    for e in mouse.events:
+        counts[e['type']] = counts.get(e['type'], 0) + 1
+
+    report = {
+        'source': source,
+        'frames': frames,
+        'frames_with_face': faces,
+        'fps': round(frames / elapsed, 2) if elapsed > 0 else 0.0,
+        'stages': metrics.summary(),
+        'event_counts': counts,
+        'events': mouse.events,
+    }
+    if latency:
+        report['motion_to_photon'] = latency.report()
+        report['motion_to_photon_text'] = latency.format_report()
+    return report
+
+def main():
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Replay a recording through the gesture pipeline.")
+    parser.add_argument("source", help="video file or directory of frames")
+    parser.add_argument("--events", help="write the full report (with events) to this JSON file")
+    parser.add_argument("--no-flip", action="store_true", help="frames are already mirrored")
+    parser.add_argument("--skip", action="store_true", help="enable adaptive frame skipping (if config.FRAME_SKIP_ENABLED)")
+    parser.add_argument("--span", type=float, default=None, help="auto-calibration box half-size (px, or degrees in head_pose mode)")
+    parser.add_argument("--latency", action="store_true", help="report motion-to-photon latency")
+    args = parser.parse_args()
+
+    report = replay(args.source, flip=not args.no_flip, skip_frames=args.skip,
+                    span=args.span, measure_latency=args.latency)
+
+    print(f"Frames: {report['frames']} ({report['frames_with_face']} with a face), "
+          f"{report['fps']} FPS")
+    for name, s in report['stages'].items():
+        print(f"  {name:<12} p50 {s['p50']:.3f}  p95 {s['p95']:.3f}  p99 {s['p99']:.3f}  max {s['max']:.3f} ms")
+    print(f"Events: {report['event_counts']}")
+    if 'motion_to_photon_text' in report:
+        print(report.pop('motion_to_photon_text'))
+
+    if args.events:
+        with open(args.events, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.events}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# scheduler.py
+"""
+Adaptive frame skipping: when FaceMesh cannot keep up with the target
+frame rate, run it only every Nth frame and extrapolate the gesture
+features (nose point, control point, eye ratios) on the frames in between.
+"""
+
+import math
+
+import numpy as np
+
+import config
+import utils
+
+class FrameScheduler:
+    """Measures frame cost and decides which frames get full inference."""
+
+    def __init__(self, target_fps=None, max_skip=None):
+        """Sets the frame budget from the target FPS and the skip ceiling."""
+        target_fps = config.TARGET_FPS if target_fps is None else target_fps
+        self.budget = 1.0 / target_fps
+        self.max_skip = config.MAX_FRAME_SKIP if max_skip is None else max_skip
+
+        # --- Smoothed timings (seconds), built with utils.smooth_val.
+        self.infer_time = None     # cost of one FaceMesh call
+        self.overhead_time = None  # other work that runs in series with it
+        self.skip = 1              # run inference every 'skip' frames
+        self._since_infer = 0
+
+    def should_infer(self):
+        """Returns True if this frame should run FaceMesh."""
+        self._since_infer += 1
+        if self._since_infer >= self.skip:
+            self._since_infer = 0
+            return True
+        return False
+
+    def record_inference(self, elapsed):
+        """Feeds the measured cost of one inference call."""
+        self.infer_time = utils.smooth_val(self.infer_time, elapsed, config.SKIP_TIMING_SMOOTHING)
+        self._update_skip()
+
+    def record_frame(self, elapsed, inferred):
+        """Feeds the total cost of one frame (sequential mode only)."""
+        # --- Overhead is only measurable on frames that ran inference.
+        if not inferred or self.infer_time is None:
+            return
+        overhead = max(0.0, elapsed - self.infer_time)
+        self.overhead_time = utils.smooth_val(self.overhead_time, overhead, config.SKIP_TIMING_SMOOTHING)
+        self._update_skip()
+
+    def _update_skip(self):
+        """Picks the smallest N so that inference/N + overhead fits the budget."""
+        overhead = self.overhead_time or 0.0
+        room = self.budget - overhead
+        if room <= 0:
+            self.skip = self.max_skip
+            return
+        needed = math.ceil(self.infer_time / room)
+        self.skip = max(1, min(self.max_skip, needed))
+
+class FeatureExtrapolator:
+    """Predicts GestureController.features() for frames that skipped inference."""
+
+    # --- Points that move with the head; the eye ratios are held at their last value.
+    MOVING = ("nose", "control")
+
+    def __init__(self):
+        """Starts with no history."""
+        self.base = None       # last inferred features dict
+        self.base_time = 0.0
+        self.velocity = {}     # smoothed velocity per moving point (units/second)
+
+    def reset(self):
+        """Forgets the history (e.g. when the face is lost)."""
+        self.base = None
+        self.velocity = {}
+
+    def update(self, feats, t):
+        """Stores the features of a freshly inferred frame taken at time t."""
+        for key in self.MOVING:
+            point = feats[key]
+            last = self.base[key] if self.base is not None else None
+            if point is None or last is None:
+                # --- No pose solve on one of the frames: restart this point's estimate.
+                self.velocity.pop(key, None)
+                continue
+            if t > self.base_time:
+                v = (np.asarray(point, dtype=np.float64) - last) / (t - self.base_time)
+                self.velocity[key] = utils.smooth_val(self.velocity.get(key), v, config.SKIP_VELOCITY_SMOOTHING)
+        self.base = feats
+        self.base_time = t
+
+    def predict(self, t):
+        """Returns the features for time t, or None without history."""
+        if self.base is None:
+            return None
+        feats = dict(self.base)
+
+        # --- Move the nose and control point along with the head's motion.
+        dt = min(t - self.base_time, config.MAX_EXTRAPOLATION)
+        for key, v in self.velocity.items():
+            x, y = np.asarray(self.base[key], dtype=np.float64) + v * dt
+            feats[key] = (int(x), int(y)) if key == "nose" else (float(x), float(y))
+        return feats
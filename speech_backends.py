@@ -0,0 +1,181 @@
+# speech_backends.py
+"""
+Pluggable speech-to-text backends for the voice assistant. Each one
+takes an sr.AudioData and returns lower-case text, raising
+sr.UnknownValueError when nothing was understood (like the
+speech_recognition calls they wrap).
+
+- GoogleBackend: Google Web Speech API (network round trip per command).
+- VoskBackend:   offline Kaldi models through vosk; runs on the CPU.
+- SphinxBackend: offline CMU PocketSphinx through speech_recognition.
+
+With config.SPEECH_GRAMMAR the offline backends decode against the
+command vocabulary from command_grammar.py first and only fall back to
+open-vocabulary recognition when that finds no command.
+
+Offline models can take seconds to load, so load() runs once on a
+background thread at startup; until it finishes (or if it fails) the
+caller uses its fallback backend.
+"""
+
+import json
+import threading
+
+import speech_recognition as sr
+
+import config
+from command_grammar import CommandGrammar
+
+class SpeechBackend:
+    """Base class: background loading and the recognize() interface."""
+
+    name = "base"
+    streaming = False   # --- True if open_stream() can decode audio as it arrives.
+
+    def __init__(self):
+        self.ready = threading.Event()
+        self.failed = False
+        self.recognizer = sr.Recognizer()
+
+    def start_loading(self):
+        """Loads the model on a daemon thread; returns self."""
+        threading.Thread(target=self._load_safely, daemon=True).start()
+        return self
+
+    def _load_safely(self):
+        try:
+            self.load()
+        except Exception as e:
+            self.failed = True
+            print(f"Speech backend '{self.name}' failed to load: {e}")
+            return
+        print(f"Speech backend '{self.name}' ready.")
+        self.ready.set()
+
+    def usable(self):
+        """True once the model is loaded."""
+        return self.ready.is_set() and not self.failed
+
+    # --- Backend-specific parts.
+    def load(self):
+        """Loads models (slow; called once, off the main thread)."""
+
+    def recognize(self, audio):
+        raise NotImplementedError
+
+class GoogleBackend(SpeechBackend):
+    """Google Web Speech API, as the assistant always used."""
+
+    name = "google"
+
+    def recognize(self, audio):
+        return self.recognizer.recognize_google(audio, language=config.SPEECH_LANGUAGE).lower()
+
+class VoskBackend(SpeechBackend):
+    """Offline recognition with a local vosk (Kaldi) model."""
+
+    name = "vosk"
+    streaming = True
+    RATE = 16000
+
+    def __init__(self, model_path=None, grammar=None):
+        super().__init__()
+        self.model_path = config.VOSK_MODEL_PATH if model_path is None else model_path
+        self.model = None
+        if grammar is None and config.SPEECH_GRAMMAR:
+            grammar = CommandGrammar()
+        self.grammar = grammar
+
+    def load(self):
+        import vosk
+        vosk.SetLogLevel(-1)
+        self._vosk = vosk
+        self.model = vosk.Model(self.model_path)
+
+    def make_recognizer(self, constrained=False):
+        """A fresh KaldiRecognizer for one utterance (cheap once the model is loaded)."""
+        if constrained and self.grammar is not None:
+            # --- The grammar is rebuilt here if config.APPS changed since the last utterance.
+            return self._vosk.KaldiRecognizer(self.model, self.RATE, self.grammar.vosk())
+        return self._vosk.KaldiRecognizer(self.model, self.RATE)
+
+    def _decode(self, pcm, constrained):
+        rec = self.make_recognizer(constrained)
+        rec.AcceptWaveform(pcm)
+        return json.loads(rec.FinalResult()).get("text", "")
+
+    def open_stream(self):
+        """Incremental (grammar-constrained) decoder for one utterance at RATE."""
+        return VoskStream(self.make_recognizer(constrained=True))
+
+    def recognize(self, audio, constrained=True):
+        pcm = audio.get_raw_data(convert_rate=self.RATE, convert_width=2)
+        text = ""
+        if constrained and self.grammar is not None:
+            text = self._decode(pcm, constrained=True)
+        if not constrained or self.grammar is None or self.grammar.needs_open_pass(text):
+            text = self._decode(pcm, constrained=False)
+        if not text:
+            raise sr.UnknownValueError()
+        return text.lower()
+
+class VoskStream:
+    """Feeds one utterance to a KaldiRecognizer chunk by chunk."""
+
+    def __init__(self, rec):
+        self.rec = rec
+        self.text = ""   # --- Segments vosk has already finalized (it endpoints on pauses).
+
+    def _commit(self, result):
+        text = json.loads(result).get("text", "")
+        if text:
+            self.text = f"{self.text} {text}".strip()
+
+    def feed(self, pcm):
+        """Adds int16 samples; returns the current hypothesis for the whole utterance."""
+        if self.rec.AcceptWaveform(pcm.tobytes()):
+            self._commit(self.rec.Result())
+            return self.text
+        partial = json.loads(self.rec.PartialResult()).get("partial", "")
+        return f"{self.text} {partial}".strip()
+
+    def finish(self):
+        """Flushes the decoder; returns the final text."""
+        self._commit(self.rec.FinalResult())
+        return self.text
+
+class SphinxBackend(SpeechBackend):
+    """Offline recognition with PocketSphinx (bundled with speech_recognition's extras)."""
+
+    name = "sphinx"
+
+    def __init__(self, grammar=None):
+        super().__init__()
+        if grammar is None and config.SPEECH_GRAMMAR:
+            grammar = CommandGrammar()
+        self.grammar = grammar
+
+    def load(self):
+        import pocketsphinx  # noqa: F401  (fail early if it isn't installed)
+
+    def recognize(self, audio):
+        if self.grammar is not None:
+            # --- Keyword spotting over the command phrases.
+            try:
+                text = self.recognizer.recognize_sphinx(audio, keyword_entries=self.grammar.keywords()).strip().lower()
+            except sr.UnknownValueError:
+                text = ""
+            if not self.grammar.needs_open_pass(text):
+                return text
+        return self.recognizer.recognize_sphinx(audio).lower()
+
+BACKENDS = {
+    "google": GoogleBackend,
+    "vosk": VoskBackend,
+    "sphinx": SphinxBackend,
+}
+
+def create_backend(name=None):
+    """Builds a backend and starts loading it in the background."""
+    name = config.SPEECH_BACKEND if name is None else name
+    return BACKENDS[name]().start_loading()
@@ -0,0 +1,125 @@
+# speech_benchmark.py
+"""
+Compares speech backends (speech_backends.py) on recorded WAV files:
+model load time, per-command recognition latency (audio in -> text
+out, which is what a command waits for after the speaker stops), and
+accuracy against an optional transcript next to each file
+(clip.wav -> clip.txt).
+
+Usage:
+    python speech_benchmark.py recordings/ [--backends google vosk] [--json out.json]
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import speech_recognition as sr
+
+from speech_backends import BACKENDS
+
+def find_wavs(paths):
+    """Expands files and directories into a sorted list of .wav paths."""
+    wavs = []
+    for path in paths:
+        if os.path.isdir(path):
+            wavs += [os.path.join(path, n) for n in sorted(os.listdir(path)) if n.lower().endswith(".wav")]
+        else:
+            wavs.append(path)
+    return wavs
+
+def load_clip(path):
+    """Returns (sr.AudioData, expected text or None)."""
+    with sr.AudioFile(path) as source:
+        audio = sr.Recognizer().record(source)
+    expected = None
+    txt = os.path.splitext(path)[0] + ".txt"
+    if os.path.exists(txt):
+        with open(txt, encoding="utf-8") as f:
+            expected = f.read().strip().lower()
+    return audio, expected
+
+def word_errors(ref, hyp):
+    """Word-level edit distance between two transcripts."""
+    r, h = ref.split(), hyp.split()
+    row = list(range(len(h) + 1))
+    for i, rw in enumerate(r, 1):
+        prev, row[0] = row[0], i
+        for j, hw in enumerate(h, 1):
+            prev, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, prev + (rw != hw))
+    return row[-1]
+
+def bench_backend(name, clips):
+    """Loads one backend and recognizes every clip; returns a result dict."""
+    backend = BACKENDS[name]()
+    t0 = time.perf_counter()
+    try:
+        backend.load()
+    except Exception as e:
+        return {'backend': name, 'error': f"load failed: {e}"}
+    load_s = time.perf_counter() - t0
+
+    latencies, rows = [], []
+    errors = words = exact = scored = 0
+    for path, audio, expected in clips:
+        t0 = time.perf_counter()
+        try:
+            text = backend.recognize(audio)
+        except sr.UnknownValueError:
+            text = ""
+        except Exception as e:
+            text = ""
+            print(f"  {name}: {os.path.basename(path)}: {e}")
+        latencies.append((time.perf_counter() - t0) * 1000.0)
+        rows.append({'file': path, 'text': text, 'expected': expected, 'ms': round(latencies[-1], 1)})
+        if expected is not None:
+            scored += 1
+            exact += text == expected
+            errors += word_errors(expected, text)
+            words += len(expected.split())
+
+    lat = np.array(latencies) if latencies else np.zeros(1)
+    return {
+        'backend': name,
+        'load_s': round(load_s, 3),
+        'p50_ms': round(float(np.percentile(lat, 50)), 1),
+        'p95_ms': round(float(np.percentile(lat, 95)), 1),
+        'max_ms': round(float(lat.max()), 1),
+        'exact': f"{exact}/{scored}" if scored else None,
+        'wer': round(errors / words, 3) if words else None,
+        'clips': rows,
+    }
+
+def main():
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark speech backends on WAV files.")
+    parser.add_argument("paths", nargs="+", help="WAV files or directories of them")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument("--json", help="write the full results to this JSON file")
+    args = parser.parse_args()
+
+    clips = [(p,) + load_clip(p) for p in find_wavs(args.paths)]
+    if not clips:
+        print("No WAV files found.")
+        return
+    print(f"{len(clips)} clips")
+
+    results = [bench_backend(name, clips) for name in args.backends]
+    print(f"  {'backend':<8} {'load s':>7} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'exact':>7} {'WER':>6}")
+    for r in results:
+        if 'error' in r:
+            print(f"  {r['backend']:<8} {r['error']}")
+            continue
+        wer = "-" if r['wer'] is None else f"{r['wer']:.3f}"
+        print(f"  {r['backend']:<8} {r['load_s']:7.2f} {r['p50_ms']:8.1f} {r['p95_ms']:8.1f} "
+              f"{r['max_ms']:8.1f} {r['exact'] or '-':>7} {wer:>6}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.json}")
+
+if __name__ == "__main__":
+    main()
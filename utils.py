@@ -4,10 +4,27 @@ Contains general-purpose utility functions, including math helpers
 for averaging points, calculating blink ratios, and smoothing values.
 """
 
-import pyautogui
+import numpy as np
+
+import config
 
 # --- Get screen dimensions once for global use.
-SCREEN_W, SCREEN_H = pyautogui.size()
+try:
+    import pyautogui
+    SCREEN_W, SCREEN_H = pyautogui.size()
+except Exception:
+    # --- No display (e.g. headless replay): use a nominal screen size.
+    SCREEN_W, SCREEN_H = config.HEADLESS_SCREEN_W, config.HEADLESS_SCREEN_H
+
+# --- Landmark index arrays for fancy indexing into an (N, 3) landmark array.
+NOSE_IDX = np.array(config.nose_idx)
+LEFT_EYE_IDX = np.array(config.left_eye)
+RIGHT_EYE_IDX = np.array(config.right_eye)
+EYES_IDX = np.array([config.left_eye, config.right_eye])
+POSE_IDX = np.array(config.pose_idx)
+ROI_IDX = np.array(config.roi_idx)
+# --- Every landmark the app reads; FaceTracker only converts these.
+TRACKED_IDX = np.unique(np.concatenate([NOSE_IDX, EYES_IDX.ravel(), POSE_IDX, ROI_IDX]))
 
 def avg_pt(lm, idx, w, h):
     """Calculates the average (x, y) pixel coordinate for a list of landmark indices."""
@@ -37,6 +54,42 @@ def blink_ratio(lm, idx, w, h):
         print(f"Blink ratio error: {e}")
         return 0.0
 
+def avg_pt_arr(pts, idx):
+    """Array version of avg_pt for an (N, 3) pixel-space landmark array."""
+    s = pts.take(idx, axis=0).sum(axis=0)
+    n = len(idx)
+    return int(s[0] / n), int(s[1] / n)
+
+def _eye_pairs(eyes_idx):
+    """Splits (n_eyes, 6) eye indices into the point pairs blink_ratio measures."""
+    # --- Pairs per eye: corner-corner (0,3), lid-lid (1,5) and (2,4).
+    eyes_idx = np.asarray(eyes_idx)
+    return eyes_idx[:, [0, 1, 2]], eyes_idx[:, [3, 5, 4]]
+
+EYES_A, EYES_B = _eye_pairs(EYES_IDX)
+
+def blink_ratios_arr(pts, eyes_a=EYES_A, eyes_b=EYES_B):
+    """Array version of blink_ratio for several eyes at once (one ratio per eye)."""
+    # --- d has shape (n_eyes, 3, 3): |difference| of each measured point pair.
+    d = np.abs(pts.take(eyes_a, axis=0) - pts.take(eyes_b, axis=0))
+    horizontal = d[:, 0, 0]
+    avg_vertical = (d[:, 1, 1] + d[:, 2, 1]) / 2.0
+    return horizontal / (avg_vertical + 1e-6)
+
+def blink_ratio_arr(pts, idx):
+    """Array version of blink_ratio for a single eye."""
+    eyes_a, eyes_b = _eye_pairs([idx])
+    return float(blink_ratios_arr(pts, eyes_a, eyes_b)[0])
+
+def detector_ratio(r_left, r_right, winks=None):
+    """The single blink ratio the blink detector (and its threshold calibration) sees."""
+    winks = config.WINKS_ENABLED if winks is None else winks
+    if winks:
+        # --- A blink needs both eyes closed; one closed eye is a wink.
+        return min(r_left, r_right)
+    # --- Average both eyes into one blink ratio.
+    return (r_left + r_right) / 2.0
+
 def smooth_val(prev, new, a):
     """Applies exponential-moving-average smoothing to a value."""
     if prev is None:
@@ -0,0 +1,84 @@
+# vad.py
+"""
+Voice activity detection for the audio stream. The energy segmenter in
+audio_stream.py starts a segment on anything loud (a cough, a desk
+bump, typing, a fan speeding up); this module decides per 10-30 ms
+chunk whether that loud audio is actually speech, so segments without
+enough voiced chunks never reach the speech recognizer.
+
+- "spectral": numpy only. Speech puts most of its energy in the
+  300-3400 Hz band and, when voiced, repeats at its pitch period
+  (60-400 Hz); noise and clicks don't repeat, hum sits below the band.
+- "webrtc":   the WebRTC VAD through the optional webrtcvad package
+  (falls back to "spectral" if it isn't installed).
+"""
+
+import numpy as np
+
+import config
+
+class SpectralVAD:
+    """Speech-band energy ratio plus pitch periodicity on one chunk."""
+
+    def __init__(self, rate, chunk):
+        """Precomputes the FFT sizes, band mask and pitch lags for this chunk size."""
+        self.rate = rate
+        self.n = chunk
+        self.window = np.hanning(chunk).astype(np.float32)
+        freqs = np.fft.rfftfreq(chunk, 1.0 / rate)
+        self.band = (freqs >= config.VAD_BAND_LOW) & (freqs <= config.VAD_BAND_HIGH)
+        # --- Autocorrelation through a zero-padded FFT (no circular wrap-around).
+        self.nfft = 1 << (2 * chunk - 1).bit_length()
+        f = np.fft.rfftfreq(self.nfft, 1.0 / rate)
+        self.ac_band = (f >= config.VAD_BAND_LOW) & (f <= config.VAD_BAND_HIGH)
+        lo = int(rate / config.VAD_PITCH_MAX)
+        hi = min(int(rate / config.VAD_PITCH_MIN), chunk // 2)
+        self.lags = np.arange(lo, hi + 1)
+        self.overlap = (chunk - self.lags) / chunk   # --- Undoes the shrinking overlap at longer lags
+
+    def features(self, chunk):
+        """Returns (fraction of energy in the speech band, periodicity 0-1)."""
+        if len(chunk) != self.n:
+            chunk = np.resize(chunk, self.n)
+        x = chunk.astype(np.float32)
+        x -= x.mean()
+        power = np.abs(np.fft.rfft(x * self.window)) ** 2 + 1e-6
+        ratio = power[self.band].sum() / power.sum()
+        # --- Normalized autocorrelation peak over the pitch lags: voiced speech repeats.
+        # --- Pre-emphasized and band-limited first, so low-frequency noise (rumble, fans),
+        # --- which piles up at the bottom of the band, doesn't look periodic.
+        spec = np.fft.rfft(x[1:] - 0.6 * x[:-1], self.nfft)
+        ac = np.fft.irfft((spec.real ** 2 + spec.imag ** 2) * self.ac_band, self.nfft)
+        if ac[0] <= 0:
+            return float(ratio), 0.0
+        periodicity = (ac[self.lags] / self.overlap).max() / ac[0]
+        return float(ratio), float(min(periodicity, 1.0))
+
+    def is_speech(self, chunk):
+        ratio, periodicity = self.features(chunk)
+        return ratio >= config.VAD_MIN_BAND_RATIO and periodicity >= config.VAD_MIN_PERIODICITY
+
+class WebRtcVAD:
+    """Wraps webrtcvad.Vad; only 8/16/32/48 kHz and 10/20/30 ms chunks are accepted."""
+
+    def __init__(self, rate, chunk):
+        import webrtcvad
+        if rate not in (8000, 16000, 32000, 48000) or chunk * 1000 // rate not in (10, 20, 30):
+            raise ValueError(f"webrtcvad can't take {chunk}-sample chunks at {rate} Hz")
+        self.rate = rate
+        self.vad = webrtcvad.Vad(config.VAD_WEBRTC_MODE)
+
+    def is_speech(self, chunk):
+        return self.vad.is_speech(chunk.tobytes(), self.rate)
+
+def create_vad(rate, chunk, name=None):
+    """Builds the configured detector, or None if VAD is disabled."""
+    name = config.VAD_BACKEND if name is None else name
+    if not name:
+        return None
+    if name == "webrtc":
+        try:
+            return WebRtcVAD(rate, chunk)
+        except Exception as e:
+            print(f"WebRTC VAD unavailable ({e}); using the spectral VAD.")
+    return SpectralVAD(rate, chunk)
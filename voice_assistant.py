@@ -15,6 +15,17 @@ from datetime import datetime
 import time
 import config # For APPS dictionary
 import queue # <--- CHANGED: Import queue
+from audio_stream import AudioStream
+from speech_backends import create_backend
+
+# --- Reverses each command that may run from a partial result (see _listen_streaming);
+# --- commands without an entry here never run early, whatever config lists.
+EARLY_UNDO = {
+    "scroll up": lambda: pyautogui.scroll(-500),
+    "scroll down": lambda: pyautogui.scroll(500),
+    "volume up": lambda: pyautogui.press("volumedown"),
+    "volume down": lambda: pyautogui.press("volumeup"),
+}
 
 class VoiceController:
     """Manages all voice I/O and command logic on a separate thread."""
@@ -29,6 +40,16 @@ class VoiceController:
         self.lock = shared_state['lock']
         
         self.speak_queue = queue.Queue() # <--- CHANGED: Add a thread-safe queue
+        self.audio = None # Persistent microphone stream (opened by start_listener_thread)
+
+        # --- Speech-to-text backend; offline models start loading right away in the background.
+        self.speech = create_backend(config.SPEECH_BACKEND)
+        self.fallback = None
+        if config.SPEECH_FALLBACK and config.SPEECH_FALLBACK != config.SPEECH_BACKEND:
+            self.fallback = create_backend(config.SPEECH_FALLBACK)
+        unsafe = [c for c in config.STREAM_EARLY_COMMANDS if c not in EARLY_UNDO]
+        if unsafe:
+            print(f"Early commands {unsafe} can't be undone; they wait for the final result.")
 
     # <--- CHANGED: This function is now non-blocking
     def speak(self, text):
@@ -36,15 +57,125 @@ class VoiceController:
         print(f"Assistant (Queued): {text}")
         self.speak_queue.put(text)
 
+    def _check_audio(self):
+        """Falls back to the per-command microphone if the audio stream stopped itself."""
+        if self.audio is None or self.audio.running:
+            return
+        print(f"Audio stream failed ({self.audio.error}); opening the microphone per command.")
+        try:
+            self.audio.stop()
+        except Exception as e:
+            print(f"Error closing the audio stream: {e}")
+        self.audio = None
+        self.speak("Microphone stream failed. Listening per command instead.")
+
+    def _capture(self, timeout, phrase_time_limit):
+        """Returns the next utterance as sr.AudioData (raises sr.WaitTimeoutError if none)."""
+        if self.audio:
+            # --- Already segmented from the open stream; no device open or noise calibration.
+            audio = self.audio.get_utterance(timeout)
+            if audio is None:
+                raise sr.WaitTimeoutError("no speech")
+            return audio
+
+        # --- Fallback: open the microphone for this one command.
+        with sr.Microphone() as source:
+            self.recognizer.adjust_for_ambient_noise(source, duration=0.5)
+            print(" Listening for command...")
+            return self.recognizer.listen(source, timeout=timeout, phrase_time_limit=phrase_time_limit)
+
+    def _recognize(self, audio):
+        """Runs the configured backend, or the fallback while it loads / if it failed."""
+        backend = self.speech if self.speech.usable() else self.fallback
+        if backend is None or not backend.usable():
+            print("Speech model is still loading...")
+            raise sr.UnknownValueError()
+        return backend.recognize(audio)
+
+    def _can_stream(self):
+        """True if the next utterance can be decoded while it is being spoken."""
+        return (self.audio is not None and self.audio.live and self.speech.streaming
+                and self.speech.usable() and self.audio.segmenter.rate == self.speech.RATE)
+
+    def _is_early(self, text):
+        """True if a partial result is a whole, unambiguous command that is safe to run early."""
+        # --- Only commands _undo_early can take back if the final result disagrees.
+        if text not in config.STREAM_EARLY_COMMANDS or text not in EARLY_UNDO:
+            return False
+        grammar = self.speech.grammar
+        if grammar is not None:
+            return grammar.is_complete(text)
+        return not any(c.startswith(text + " ") for c in config.STREAM_EARLY_COMMANDS)
+
+    def _undo_early(self, command):
+        """Reverts a command that ran early but that the final result contradicted."""
+        undo = EARLY_UNDO.get(command)
+        if undo is None:
+            print(f"Can't undo early '{command}'.")
+            return
+        undo()
+        print(f"Undid early '{command}'.")
+
+    def _listen_streaming(self, timeout):
+        """Decodes the next utterance as it arrives, running safe commands from partial results.
+
+        Returns the final text, or "" if nothing was heard or it matches a command that already ran.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            event = self.audio.get_event(max(0.0, deadline - time.monotonic()))
+            if event is None:
+                return ""
+            kind, payload = event
+            if kind == "start":
+                break
+            if kind == "end" and payload is not None:
+                return self._recognize(payload) # Its start was dropped (e.g. by clear())
+
+        stream = self.speech.open_stream()
+        fired, last, stable = None, None, 0
+        while kind in ("start", "chunk"):
+            text = stream.feed(payload)
+            if fired is None:
+                # --- Act only on a partial that has stopped changing.
+                stable = stable + 1 if text == last else 1
+                last = text
+                if stable >= config.STREAM_STABLE_PARTIALS and self._is_early(text):
+                    fired = text
+                    print(f" You said (early): {text}")
+                    self._execute_command(text)
+            event = self.audio.get_event(config.AUDIO_MAX_UTTERANCE + 1.0)
+            kind, payload = event if event is not None else ("end", None)
+
+        final = stream.finish()
+        grammar = self.speech.grammar
+        if grammar is not None and grammar.needs_open_pass(final):
+            # --- Not a fixed command (or a search): decode the whole utterance open-vocabulary.
+            final = ""
+            if payload is not None:
+                try:
+                    final = self.speech.recognize(payload, constrained=False)
+                except sr.UnknownValueError:
+                    pass
+
+        if fired is not None:
+            if not final or final == fired:
+                return ""
+            self._undo_early(fired)
+        return final
+
     def _listen_once(self, timeout=4, phrase_time_limit=5):
         """Listens once for a voice command and returns the text."""
         try:
-            with sr.Microphone() as source:
-                self.recognizer.adjust_for_ambient_noise(source, duration=0.5)
-                print(" Listening for command...")
-                audio = self.recognizer.listen(source, timeout=timeout, phrase_time_limit=phrase_time_limit)
+            if self._can_stream():
+                command = self._listen_streaming(timeout)
+                if command:
+                    print(f" You said: {command}")
+                return command
+
+            audio = self._capture(timeout, phrase_time_limit)
             
-            command = self.recognizer.recognize_google(audio, language="en-in").lower()
+            command = self._recognize(audio)
             print(f" You said: {command}")
             return command
         except sr.WaitTimeoutError:
@@ -189,12 +320,16 @@ class VoiceController:
                 text_to_speak = self.speak_queue.get(block=False)
                 
                 print(f"Assistant (Speaking): {text_to_speak}")
+                if self.audio:
+                    self.audio.paused = True # Don't hear our own voice as a command
                 with self.lock: # Use the lock just for the engine
                     try:
                         self.engine.say(text_to_speak)
                         self.engine.runAndWait()
                     except Exception as e:
                         print(f"Pyttsx3 error: {e}")
+                if self.audio:
+                    self.audio.paused = False
                 
                 self.speak_queue.task_done()
                 continue # Go back to check queue immediately
@@ -203,10 +338,13 @@ class VoiceController:
                 pass # No speech queued, continue to listening
 
             # --- 2. (Low Priority) If not speaking, check if voice is active.
+            self._check_audio()
             with self.lock:
                 active = self.state['voice_active']
             
             if not active:
+                if self.audio:
+                    self.audio.clear() # Nothing said while inactive is a command
                 time.sleep(0.1) # Sleep if not active and no speech
                 continue
             
@@ -235,6 +373,12 @@ class VoiceController:
                 time.sleep(0.05)
 
     def start_listener_thread(self):
-        """Starts the _voice_listener_loop in a new daemon thread."""
+        """Opens the persistent audio stream and starts the _voice_listener_loop in a new daemon thread."""
+        if config.AUDIO_STREAM_ENABLED and self.audio is None:
+            try:
+                self.audio = AudioStream(live=config.STREAM_COMMANDS).start()
+            except Exception as e:
+                print(f"Audio stream unavailable ({e}); opening the microphone per command.")
+                self.audio = None
         t = threading.Thread(target=self._voice_listener_loop, daemon=True)
         t.start()
\ No newline at end of file